@@ -0,0 +1,253 @@
+"""
+Local stand-ins of the OpenAI and Pexels APIs, used to measure the generation
+pipeline without API keys or network noise. A single HTTP server answers:
+
+- POST /v1/chat/completions: a canned `generate_pptx` tool call (streamed
+  when requested), the deck having the number of slides of the prompt.
+- GET /v1/search: a Pexels search result pointing at the image host below.
+- GET /images/<name>.jpg?w=&h=: a synthetic JPEG of the requested size.
+
+Each route answers after its configured latency.
+"""
+import io
+import re
+import json
+import time
+import random
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+# Pexels "src" variants as (name, width, height), None keeping the aspect ratio
+PEXELS_SRC_SIZES = [
+    ("original", 4000, 3000),
+    ("large2x", 1880, 1410),
+    ("large", 940, 705),
+    ("medium", None, 350),
+    ("small", None, 130),
+]
+
+
+def get_fake_slides(topic, num_slides):
+    """A deck using the text, list and picture layouts, ending with a thank you slide."""
+    slides = [
+        {
+            "layout_id": 0,
+            "layout_name": "Title Slide",
+            "content": [
+                {"name": "Title 1", "value": topic},
+                {"name": "Subtitle 2", "value": f"An overview of {topic}"},
+            ],
+        }
+    ]
+    bullets = [f"Key point {i} about {topic}, with a few words of detail" for i in range(5)]
+    body_layouts = [
+        {
+            "layout_id": 1,
+            "layout_name": "Title and Content",
+            "content": [
+                {"name": "Title 1", "value": "{title}"},
+                {"name": "Content Placeholder 2", "value": bullets},
+            ],
+        },
+        {
+            "layout_id": 8,
+            "layout_name": "Picture with Caption",
+            "content": [
+                {"name": "Title 1", "value": "{title}"},
+                {"name": "Picture Placeholder 2", "value": "{topic} illustration {index}"},
+                {"name": "Text Placeholder 3", "value": bullets[:3]},
+            ],
+        },
+        {
+            "layout_id": 3,
+            "layout_name": "Two Content",
+            "content": [
+                {"name": "Title 1", "value": "{title}"},
+                {"name": "Content Placeholder 2", "value": bullets[:3]},
+                {"name": "Content Placeholder 3", "value": bullets[2:]},
+            ],
+        },
+    ]
+    for index in range(1, num_slides - 1):
+        layout = body_layouts[(index - 1) % len(body_layouts)]
+        values = {"title": f"{topic}: part {index}", "topic": topic, "index": index}
+        slides.append(
+            {
+                **layout,
+                "content": [
+                    {
+                        "name": item["name"],
+                        "value": item["value"].format(**values)
+                        if isinstance(item["value"], str)
+                        else item["value"],
+                    }
+                    for item in layout["content"]
+                ],
+            }
+        )
+    if num_slides > 1:
+        slides.append(
+            {
+                "layout_id": 2,
+                "layout_name": "Section Header",
+                "content": [
+                    {"name": "Title 1", "value": "Thank You!"},
+                    {"name": "Text Placeholder 2", "value": ["Questions?"]},
+                ],
+            }
+        )
+    return slides
+
+
+@lru_cache(maxsize=64)
+def get_fake_jpeg(width, height):
+    # Noise compresses poorly, the images weigh as much as photos do
+    rng = random.Random(width * 10007 + height)
+    noise = bytes(rng.getrandbits(8) for _ in range((width // 8) * (height // 8) * 3))
+    image = Image.frombytes("RGB", (width // 8, height // 8), noise)
+    image = image.resize((width, height), Image.Resampling.BILINEAR)
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+class FakeServicesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type="application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.endswith("/search"):
+            time.sleep(self.server.search_latency)
+            self.send_body(json.dumps(self.get_search_response(query["query"][0])).encode())
+        elif url.path.startswith("/images/"):
+            time.sleep(self.server.image_latency)
+            width = int(query.get("w", [4000])[0])
+            height = int(query.get("h", [3000])[0])
+            self.send_body(get_fake_jpeg(width, height), "image/jpeg")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        prompt = body["messages"][-1]["content"]
+        topic = re.search(r"Topic: (.*)", prompt).group(1).strip()
+        num_slides = int(re.search(r"Number of slides: (\d+)", prompt).group(1))
+        arguments = json.dumps({"slides": get_fake_slides(topic, num_slides)})
+
+        time.sleep(self.server.llm_latency)
+        if body.get("stream"):
+            self.stream_completion(body["model"], arguments)
+        else:
+            self.send_body(json.dumps(self.get_completion(body["model"], arguments)).encode())
+
+    def get_search_response(self, query):
+        photo_id = abs(hash(query)) % 10**8
+        image_url = f"http://{self.server.address}/images/{photo_id}.jpg"
+        src = {
+            name: f"{image_url}?w={width or height * 4 // 3}&h={height}"
+            for name, width, height in PEXELS_SRC_SIZES
+        }
+        return {
+            "photos": [
+                {"id": photo_id, "width": 4000, "height": 3000, "alt": query, "src": src}
+            ]
+        }
+
+    def get_completion(self, model, arguments):
+        return {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "call_benchmark",
+                                "type": "function",
+                                "function": {"name": "generate_pptx", "arguments": arguments},
+                            }
+                        ],
+                    },
+                }
+            ],
+        }
+
+    def stream_completion(self, model, arguments, chunk_size=64):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i in range(0, len(arguments), chunk_size):
+            tool_call = {"index": 0, "function": {"arguments": arguments[i : i + chunk_size]}}
+            if i == 0:
+                tool_call.update(id="call_benchmark", type="function")
+                tool_call["function"]["name"] = "generate_pptx"
+            chunk = {
+                "id": "chatcmpl-benchmark",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"tool_calls": [tool_call]}}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            # Spread the generation latency over the streamed tokens
+            time.sleep(self.server.token_latency)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+class FakeServices(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, llm_latency=0.5, search_latency=0.05, image_latency=0.05, token_latency=0.01):
+        super().__init__(("127.0.0.1", 0), FakeServicesHandler)
+        self.llm_latency = llm_latency
+        self.search_latency = search_latency
+        self.image_latency = image_latency
+        self.token_latency = token_latency
+        self.address = f"127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def openai_base_url(self):
+        return f"http://{self.address}/v1"
+
+    @property
+    def pexels_api_url(self):
+        return f"http://{self.address}/v1"
+
+    @property
+    def images_url(self):
+        return f"http://{self.address}/images"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,150 @@
+"""
+HTTP load generator for the presentation API, see the run_load_test
+management command.
+
+Every virtual user logs in, then runs actions drawn from a weighted mix until
+the test ends: create a presentation, poll its status, list presentations
+and download completed ones. Latencies and errors are recorded per endpoint.
+"""
+import time
+import random
+import asyncio
+import statistics
+from collections import Counter, defaultdict
+
+import httpx
+
+from .suite import percentile
+
+ACTIONS = ["create", "status", "list", "download"]
+DEFAULT_MIX = {"create": 1, "status": 6, "list": 1, "download": 2}
+
+
+def parse_mix(value):
+    """Parses "create=1,status=6" into {"create": 1, "status": 6}."""
+    mix = {}
+    for item in value.split(","):
+        action, _, weight = item.partition("=")
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action {action!r}, expected one of {ACTIONS}")
+        mix[action] = float(weight or 1)
+    return mix
+
+
+class LoadTestStats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+
+    def record(self, endpoint, latency, status):
+        self.latencies[endpoint].append(latency)
+        self.statuses[endpoint][status] += 1
+        if status == "error" or status >= 400:
+            self.errors[endpoint] += 1
+
+    def report(self, duration):
+        """{endpoint: {requests, rps, error_rate, p50_ms, p95_ms, p99_ms, statuses}}"""
+        report = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies_ms = [x * 1000 for x in latencies]
+            report[endpoint] = {
+                "requests": len(latencies),
+                "rps": round(len(latencies) / duration, 2),
+                "error_rate": round(self.errors[endpoint] / len(latencies), 4),
+                "p50_ms": round(statistics.median(latencies_ms), 2),
+                "p95_ms": round(percentile(latencies_ms, 95), 2),
+                "p99_ms": round(percentile(latencies_ms, 99), 2),
+                "statuses": {str(k): v for k, v in self.statuses[endpoint].items()},
+            }
+        return report
+
+
+class LoadTest:
+    def __init__(self, base_url, credentials, duration, mix=None, think_time=0.5, ramp_up=0):
+        self.base_url = base_url.rstrip("/")
+        self.credentials = credentials
+        self.duration = duration
+        self.mix = mix or DEFAULT_MIX
+        self.think_time = think_time
+        self.ramp_up = ramp_up
+        self.stats = LoadTestStats()
+
+    async def request(self, client, endpoint, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, f"{self.base_url}{path}", **kwargs)
+            await response.aread()
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "error"
+        self.stats.record(endpoint, time.perf_counter() - start, status)
+        return response
+
+    async def run_user(self, client, email, password, start_delay):
+        await asyncio.sleep(start_delay)
+        response = await self.request(
+            client, "login", "POST", "/accounts/login/",
+            json={"email": email, "password": password},
+        )
+        if response is None or response.status_code != 200:
+            return
+        headers = {"Authorization": f"Bearer {response.json()['access']}"}
+
+        presentations = []
+        completed = []
+        actions, weights = zip(*self.mix.items())
+        while time.monotonic() < self.deadline:
+            action = random.choices(actions, weights)[0]
+            if action == "download" and not completed:
+                action = "status"
+            if action == "status" and not presentations:
+                action = "create"
+
+            if action == "create":
+                response = await self.request(
+                    client, "create", "POST", "/api/v1/presentations/",
+                    headers=headers,
+                    json={
+                        "topic": f"Load test {random.randrange(10**6)}",
+                        "description": "Presentation created by the load test",
+                        "num_slides": random.randint(3, 8),
+                        "theme": {},
+                    },
+                )
+                if response is not None and response.status_code == 200:
+                    presentations.append(response.json()["id"])
+            elif action == "status":
+                presentation_id = random.choice(presentations)
+                response = await self.request(
+                    client, "status", "GET", f"/api/v1/presentations/{presentation_id}/",
+                    headers=headers,
+                )
+                if response is not None and response.status_code == 200:
+                    if response.json()["status"] == "completed" and presentation_id not in completed:
+                        completed.append(presentation_id)
+            elif action == "list":
+                await self.request(client, "list", "GET", "/api/v1/presentations/", headers=headers)
+            else:
+                presentation_id = random.choice(completed)
+                await self.request(
+                    client, "download", "GET", f"/api/v1/presentations/{presentation_id}/download",
+                    headers=headers,
+                )
+            await asyncio.sleep(random.uniform(0, 2 * self.think_time))
+
+    async def run(self):
+        """Runs every user until the duration elapsed, returns the report."""
+        limits = httpx.Limits(max_connections=len(self.credentials))
+        async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+            start = time.monotonic()
+            self.deadline = start + self.ramp_up + self.duration
+            users = len(self.credentials)
+            await asyncio.gather(
+                *[
+                    self.run_user(client, email, password, self.ramp_up * i / users)
+                    for i, (email, password) in enumerate(self.credentials)
+                ]
+            )
+            elapsed = time.monotonic() - start
+        return self.stats.report(elapsed)
@@ -0,0 +1,205 @@
+"""
+Benchmarks of the generation pipeline against the local stand-ins of
+benchmarks.fake_services, see the run_benchmarks management command.
+
+Every benchmark returns a {metric: value} mapping, latencies in milliseconds.
+Metrics ending with "_per_s" are better when higher, all others when lower.
+"""
+import time
+import uuid
+import statistics
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+import config
+from accounts.models import CustomUser
+from ppt_app.models import Presentation, PresentationSlide
+from ppt_app.views import PresentationDownloadView, process_presentation_obj
+from utils.ppt_utils import generate_pptx_strem, get_placeholder_size_px
+from .fake_services import get_fake_slides
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(int(round(percent / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def summarize(name, durations):
+    """p50/p95/max of durations given in seconds."""
+    durations_ms = [x * 1000 for x in durations]
+    return {
+        f"{name}_p50_ms": round(statistics.median(durations_ms), 2),
+        f"{name}_p95_ms": round(percentile(durations_ms, 95), 2),
+        f"{name}_max_ms": round(max(durations_ms), 2),
+    }
+
+
+def get_benchmark_user():
+    user, _ = CustomUser.objects.get_or_create(email="benchmark@localhost")
+    return user
+
+
+def create_presentations(user, run_id, count, num_slides):
+    return [
+        Presentation.objects.create(
+            user=user,
+            topic=f"Benchmark {run_id} deck {i}",
+            description="Generated by the benchmark suite",
+            num_slides=num_slides,
+            theme={},
+        )
+        for i in range(count)
+    ]
+
+
+def bench_generation(user, run_id, decks, num_slides, concurrency):
+    """End-to-end generation (LLM, image search, DB writes) of distinct decks."""
+    presentations = create_presentations(user, run_id, decks, num_slides)
+
+    def generate(presentation):
+        start = time.perf_counter()
+        ok = process_presentation_obj(presentation)
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(generate, presentations))
+    elapsed = time.perf_counter() - start
+
+    failed = sum(1 for ok, _ in results if not ok)
+    if failed:
+        raise RuntimeError(f"{failed} of {decks} benchmark generations failed")
+    return {
+        "generation_decks_per_s": round(decks / elapsed, 3),
+        **summarize("generation", [duration for _, duration in results]),
+    }
+
+
+def get_default_theme():
+    """The theme of a deck created without one."""
+    presentation = Presentation(theme={})
+    presentation.set_default_theme()
+    return presentation.theme
+
+
+def set_fake_image_urls(slides, images_url):
+    """Points the pictures at the image host of the stand-ins, sized for their placeholder."""
+    for index, slide in enumerate(slides):
+        for placeholder in slide["content"]:
+            if "picture" in placeholder["name"].lower():
+                width, height = get_placeholder_size_px(slide["layout_id"], placeholder["name"])
+                # One pixel wider per slide, so that every picture is a distinct image
+                placeholder["image_url"] = (
+                    f"{images_url}/render-{index}.jpg?w={width + index}&h={height}"
+                )
+
+
+def measure_render(name, slides, theme, repeat):
+    # Warm up the template and placeholder caches (and the slide part cache),
+    # the images are downloaded once and then come from the image cache
+    generate_pptx_strem(slides, theme)
+
+    durations = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        pptx_stream, _ = generate_pptx_strem(slides, theme)
+        durations.append(time.perf_counter() - start)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    results = summarize(name, durations)
+    results[f"{name}_peak_kb"] = round(peak / 1024, 1)
+    results[f"{name}_size_kb"] = round(len(pptx_stream.getvalue()) / 1024, 1)
+    return results
+
+
+def bench_render(deck_sizes, repeat, images_url):
+    """
+    generate_pptx_strem time, Python memory peak and file size by deck size,
+    with the default theme and the pictures of the image host: full renders
+    with the slide part cache off, and renders reassembled from it (`_cached`).
+    """
+    results = {}
+    theme = get_default_theme()
+    cache_enabled = config.SLIDE_PART_CACHE_ENABLED
+    for num_slides in deck_sizes:
+        slides = get_fake_slides(f"Render {num_slides}", num_slides)
+        set_fake_image_urls(slides, images_url)
+
+        name = f"render_{num_slides}_slides"
+        try:
+            config.SLIDE_PART_CACHE_ENABLED = False
+            results.update(measure_render(name, slides, theme, repeat))
+            config.SLIDE_PART_CACHE_ENABLED = True
+            results.update(measure_render(f"{name}_cached", slides, theme, repeat))
+        finally:
+            config.SLIDE_PART_CACHE_ENABLED = cache_enabled
+    return results
+
+
+def bench_download(user, run_id, num_slides, requests):
+    """Latency of the download endpoint, first (cold) and cached (warm) renders."""
+    presentation = create_presentations(user, f"{run_id} download", 1, num_slides)[0]
+    if not process_presentation_obj(presentation):
+        raise RuntimeError("Generation of the download benchmark deck failed")
+
+    # Throttling would turn the measured requests into 429s
+    view = PresentationDownloadView.as_view(throttle_classes=[])
+    factory = APIRequestFactory()
+
+    def download():
+        request = factory.get(f"/api/v1/presentations/{presentation.id}/download")
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        response = view(request, id=presentation.id)
+        b"".join(response.streaming_content if response.streaming else [response.content])
+        if response.status_code != 200:
+            raise RuntimeError(f"Download returned {response.status_code}")
+        return time.perf_counter() - start
+
+    cold = download()
+    warm = [download() for _ in range(requests)]
+    return {"download_cold_ms": round(cold * 1000, 2), **summarize("download_warm", warm)}
+
+
+def cleanup(user):
+    PresentationSlide.objects.filter(presentation__user=user).delete()
+    Presentation.objects.filter(user=user).delete()
+
+
+def run_suite(decks, num_slides, concurrency, deck_sizes, repeat, download_requests, images_url):
+    user = get_benchmark_user()
+    # Unique topics, so image searches and coalescing start cold on every run
+    run_id = uuid.uuid4().hex[:8]
+    try:
+        results = {}
+        results.update(bench_generation(user, run_id, decks, num_slides, concurrency))
+        results.update(bench_render(deck_sizes, repeat, images_url))
+        results.update(bench_download(user, run_id, num_slides, download_requests))
+        return results
+    finally:
+        cleanup(user)
+
+
+def is_higher_better(metric):
+    return metric.endswith("_per_s")
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns (metric, baseline, current, relative change, regressed) rows for
+    the metrics of both reports, a regression being a change for the worse
+    larger than `tolerance` (0.1 for 10%).
+    """
+    rows = []
+    for metric, current in results.items():
+        if metric not in baseline or not baseline[metric]:
+            continue
+        change = (current - baseline[metric]) / baseline[metric]
+        worse = -change if is_higher_better(metric) else change
+        rows.append((metric, baseline[metric], current, change, worse > tolerance))
+    return rows
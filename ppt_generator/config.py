@@ -7,3 +7,108 @@ JWT_SIGNING_KEY = os.getenv('JWT_SIGNING_KEY')
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 PEXEL_API_KEY = os.getenv('PEXEL_API_KEY')
+# API endpoints, overridden to run against local stand-ins (benchmarks)
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+PEXELS_API_URL = os.getenv('PEXELS_API_URL', 'https://api.pexels.com/v1')
+
+# Presentation generation worker pool
+PPT_WORKER_CONCURRENCY = int(os.getenv('PPT_WORKER_CONCURRENCY', 4))
+PPT_WORKER_POLL_TIMEOUT = int(os.getenv('PPT_WORKER_POLL_TIMEOUT', 5))
+PPT_JOB_LEASE_SECONDS = int(os.getenv('PPT_JOB_LEASE_SECONDS', 300))
+# Seconds a worker waits before retrying after a Redis error
+PPT_WORKER_RETRY_DELAY = float(os.getenv('PPT_WORKER_RETRY_DELAY', 5))
+
+# Maximum number of parallel Pexels searches per presentation
+PEXELS_MAX_CONCURRENCY = int(os.getenv('PEXELS_MAX_CONCURRENCY', 8))
+
+# Image downloads used while rendering PPTX files
+IMAGE_FETCH_MAX_CONCURRENCY = int(os.getenv('IMAGE_FETCH_MAX_CONCURRENCY', 8))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 128 * 1024 * 1024))
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR')  # On-disk spill, disabled if unset
+IMAGE_CACHE_MAX_DISK_BYTES = int(os.getenv('IMAGE_CACHE_MAX_DISK_BYTES', 1024 * 1024 * 1024))
+
+# Rendered PPTX files served by the download endpoint
+PPTX_ARTIFACT_DIR = os.getenv(
+    'PPTX_ARTIFACT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media', 'pptx'),
+)
+
+# Pexels search results cache (seconds)
+PEXELS_SEARCH_CACHE_TTL = int(os.getenv('PEXELS_SEARCH_CACHE_TTL', 7 * 24 * 3600))
+PEXELS_MISS_CACHE_TTL = int(os.getenv('PEXELS_MISS_CACHE_TTL', 3600))
+PEXELS_ERROR_CACHE_TTL = int(os.getenv('PEXELS_ERROR_CACHE_TTL', 60))
+
+# OpenAI client (timeouts in seconds)
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 120))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', 10))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', 20))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 10))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 60))
+
+# Stream the LLM response and save every slide as soon as it is complete
+OPENAI_STREAMING = os.getenv('OPENAI_STREAMING', 'False') == 'True'
+
+# Log a line for every slide saved to the database
+LOG_SLIDE_PERSISTENCE = os.getenv('LOG_SLIDE_PERSISTENCE', 'False') == 'True'
+
+# Presentation list pagination
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', 20))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+
+# Number of themed PPTX templates kept in memory by the renderer
+THEME_TEMPLATE_CACHE_SIZE = int(os.getenv('THEME_TEMPLATE_CACHE_SIZE', 64))
+
+# Images embedded in the decks
+IMAGE_TARGET_DPI = int(os.getenv('IMAGE_TARGET_DPI', 150))
+IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', 1600))
+IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', 80))
+
+# Download endpoint: render into a spooled temporary file and stream it
+PPTX_STREAMING_DOWNLOAD = os.getenv('PPTX_STREAMING_DOWNLOAD', 'True') == 'True'
+PPTX_SPOOL_MAX_MEMORY = int(os.getenv('PPTX_SPOOL_MAX_MEMORY', 4 * 1024 * 1024))
+PPTX_STREAM_CHUNK_SIZE = int(os.getenv('PPTX_STREAM_CHUNK_SIZE', 64 * 1024))
+
+# HTTP clients of the Pexels search and the image downloads
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 30))
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 100))
+
+# Push-based status endpoints (seconds)
+LONG_POLL_TIMEOUT = float(os.getenv('LONG_POLL_TIMEOUT', 25))
+SSE_KEEPALIVE_SECONDS = float(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+SSE_MAX_SECONDS = float(os.getenv('SSE_MAX_SECONDS', 300))
+
+# Opt-in cache of LLM completions, keyed by model, messages and tools
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'False') == 'True'
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 10000))
+
+# Coalescing of concurrent generations of the same topic/description/num_slides
+GENERATION_COALESCING = os.getenv('GENERATION_COALESCING', 'True') == 'True'
+GENERATION_LOCK_TIMEOUT = int(os.getenv('GENERATION_LOCK_TIMEOUT', 300))
+GENERATION_RESULT_TTL = int(os.getenv('GENERATION_RESULT_TTL', 60))
+GENERATION_POLL_INTERVAL = int(os.getenv('GENERATION_POLL_INTERVAL', 1))
+
+# Batch creation endpoint
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', 500))
+BATCH_ENQUEUE_CHUNK_SIZE = int(os.getenv('BATCH_ENQUEUE_CHUNK_SIZE', 100))
+
+# Prometheus metrics endpoint (/internal/metrics), local scrapes only without a token
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Opt-in profiling (cProfile and tracemalloc) of sampled requests and jobs, or
+# of requests sending the X-Profile header with PROFILING_TOKEN
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media', 'profiles'),
+)
+PROFILING_TRACEMALLOC = os.getenv('PROFILING_TRACEMALLOC', 'True') == 'True'
+
+# Rendered slide parts reused by later renders of unchanged slides
+SLIDE_PART_CACHE_ENABLED = os.getenv('SLIDE_PART_CACHE_ENABLED', 'True') == 'True'
+SLIDE_PART_CACHE_MAX_BYTES = int(os.getenv('SLIDE_PART_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+SLIDE_PART_CACHE_DIR = os.getenv('SLIDE_PART_CACHE_DIR')  # On-disk spill, disabled if unset
+SLIDE_PART_CACHE_MAX_DISK_BYTES = int(os.getenv('SLIDE_PART_CACHE_MAX_DISK_BYTES', 1024 * 1024 * 1024))
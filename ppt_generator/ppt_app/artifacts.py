@@ -0,0 +1,70 @@
+# ppt_app/artifacts.py
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import logging
+
+import config
+from utils.metrics import count_cache_lookup
+
+
+def compute_content_hash(slide_data, theme):
+    """Hash of the ordered slides and the theme, i.e. of everything rendered."""
+    payload = json.dumps({"slides": slide_data, "theme": theme}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_artifact_dir(presentation_id):
+    return os.path.join(config.PPTX_ARTIFACT_DIR, str(presentation_id))
+
+
+def get_artifact_path(presentation_id, content_hash):
+    return os.path.join(get_artifact_dir(presentation_id), f"{content_hash}.pptx")
+
+
+def open_artifact(presentation_id, content_hash):
+    """Returns the cached PPTX file opened for reading, or None on a miss."""
+    try:
+        pptx_stream = open(get_artifact_path(presentation_id, content_hash), "rb")
+    except FileNotFoundError:
+        count_cache_lookup("artifact", False)
+        return None
+    count_cache_lookup("artifact", True)
+    return pptx_stream
+
+
+def store_artifact(presentation_id, content_hash, pptx_stream):
+    """
+    Writes the rendered PPTX to the cache and drops the older renders of the
+    presentation. The stream is rewound so it can still be sent as response.
+    """
+    artifact_dir = get_artifact_dir(presentation_id)
+    path = get_artifact_path(presentation_id, content_hash)
+    try:
+        os.makedirs(artifact_dir, exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(pptx_stream, f)
+        os.replace(tmp_path, path)
+
+        for name in os.listdir(artifact_dir):
+            if name != os.path.basename(path) and not name.endswith(".tmp"):
+                _remove(os.path.join(artifact_dir, name))
+    except OSError as e:
+        logging.warning(f"Error caching pptx, presentation_id: {presentation_id}, Error: {e}")
+    finally:
+        pptx_stream.seek(0)
+
+
+def invalidate_artifacts(presentation_id):
+    """Drops every cached render of the presentation."""
+    shutil.rmtree(get_artifact_dir(presentation_id), ignore_errors=True)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
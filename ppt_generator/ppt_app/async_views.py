@@ -0,0 +1,222 @@
+# ppt_app/async_views.py
+import json
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+import config
+from utils.pexels_utils import async_prefetch_images
+from utils.ppt_utils import generate_pptx_spooled, get_image_urls, get_uncached_slides
+
+from .artifacts import compute_content_hash, open_artifact, store_artifact
+from .models import Presentation, PresentationSlide
+from .notifications import (
+    FINAL_STATUSES,
+    get_presentation_state,
+    next_state,
+    subscribe,
+    unsubscribe,
+)
+from .pagination import InvalidCursor, akeyset_paginate
+from .serializers import PresentationSerializer, PresentationSummarySerializer
+from .views import get_pptx_response
+
+
+async def authenticate(request):
+    """Authenticates the JWT of the request, returns the user or None."""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def jwt_required(view):
+    """
+    Async counterpart of the IsAuthenticated permission and the default user
+    throttle of the DRF views.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."}, status=401
+            )
+        request.user = user
+
+        if not await sync_to_async(UserRateThrottle().allow_request)(request, None):
+            return JsonResponse({"detail": "Request was throttled."}, status=429)
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@require_GET
+@jwt_required
+async def presentation_list(request):
+    presentations = Presentation.objects.filter(user=request.user).only(
+        *PresentationSummarySerializer.Meta.fields
+    )
+    try:
+        page, next_cursor = await akeyset_paginate(
+            presentations,
+            cursor=request.GET.get("cursor"),
+            page_size=request.GET.get("page_size"),
+        )
+    except InvalidCursor:
+        return JsonResponse({"detail": "Invalid cursor."}, status=400)
+    serializer = PresentationSummarySerializer(page, many=True)
+    return JsonResponse({"results": serializer.data, "next_cursor": next_cursor})
+
+
+@require_GET
+@jwt_required
+async def presentation_detail(request, id):
+    try:
+        presentation = await Presentation.objects.aget(id=id, user=request.user)
+    except Presentation.DoesNotExist:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    return JsonResponse(PresentationSerializer(presentation).data)
+
+
+@require_GET
+@jwt_required
+async def presentation_download(request, id):
+    try:
+        presentation = await Presentation.objects.aget(id=id, user=request.user)
+    except Presentation.DoesNotExist:
+        return JsonResponse({"detail": "Presentation not found"}, status=404)
+    if presentation.status != "completed":
+        return JsonResponse({"detail": "Presentation status is not completed"}, status=404)
+
+    slide_data = [
+        {"layout_id": slide.layout_id, "content": slide.content}
+        async for slide in PresentationSlide.objects.filter(
+            presentation=presentation
+        ).order_by("index")
+    ]
+    theme = presentation.theme
+
+    content_hash = compute_content_hash(slide_data, theme)
+    etag = f'"{content_hash}"'
+    last_modified = int(presentation.update_time.timestamp())
+    if not_modified := get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    ):
+        return not_modified
+
+    pptx_stream = await asyncio.to_thread(open_artifact, presentation.id, content_hash)
+    if pptx_stream is None:
+        # Images are downloaded on the event loop, only the python-pptx build
+        # runs in a thread
+        images = await async_prefetch_images(
+            get_image_urls(get_uncached_slides(slide_data, theme))
+        )
+        pptx_stream, complete = await asyncio.to_thread(
+            generate_pptx_spooled, slide_data, theme, images
+        )
+        if complete:
+            await asyncio.to_thread(store_artifact, presentation.id, content_hash, pptx_stream)
+
+    return get_pptx_response(presentation, pptx_stream, etag, last_modified)
+
+
+def get_timeout(value, default, maximum):
+    try:
+        timeout = float(value) if value else default
+    except ValueError:
+        timeout = default
+    return max(0, min(timeout, maximum))
+
+
+async def get_current_state(presentation_id, user):
+    presentation = await Presentation.objects.only(
+        "id", "status", "slides_done", "num_slides"
+    ).aget(id=presentation_id, user=user)
+    return get_presentation_state(presentation)
+
+
+@require_GET
+@jwt_required
+async def presentation_wait(request, id):
+    """
+    Long-poll: returns the presentation state as soon as it differs from the
+    `status` / `slides_done` the client already knows, or after `timeout`
+    seconds.
+    """
+    known_status = request.GET.get("status")
+    known_slides_done = request.GET.get("slides_done")
+    timeout = get_timeout(
+        request.GET.get("timeout"), config.LONG_POLL_TIMEOUT, config.LONG_POLL_TIMEOUT
+    )
+
+    def is_known(state):
+        return state["status"] == known_status and (
+            known_slides_done is None or str(state["slides_done"]) == known_slides_done
+        )
+
+    # Subscribe before reading the state, so no change is missed in between
+    pubsub = await subscribe(id)
+    try:
+        try:
+            state = await get_current_state(id, request.user)
+        except Presentation.DoesNotExist:
+            return JsonResponse({"detail": "Not found."}, status=404)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while is_known(state) and (remaining := deadline - loop.time()) > 0:
+            if (published := await next_state(pubsub, remaining)) is not None:
+                state = published
+    finally:
+        await unsubscribe(pubsub)
+    return JsonResponse(state)
+
+
+@require_GET
+@jwt_required
+async def presentation_events(request, id):
+    """
+    Server-sent events stream of the presentation state: the current state,
+    then every change until the presentation is completed or failed.
+    """
+    pubsub = await subscribe(id)
+    try:
+        state = await get_current_state(id, request.user)
+    except Presentation.DoesNotExist:
+        await unsubscribe(pubsub)
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    async def events(state):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.SSE_MAX_SECONDS
+        try:
+            yield f"event: state\ndata: {json.dumps(state)}\n\n"
+            while state["status"] not in FINAL_STATUSES:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break  # Clients reconnect and get the current state
+                published = await next_state(
+                    pubsub, min(config.SSE_KEEPALIVE_SECONDS, remaining)
+                )
+                if published is None:
+                    yield ": keepalive\n\n"
+                    continue
+                state = published
+                yield f"event: state\ndata: {json.dumps(state)}\n\n"
+        finally:
+            await unsubscribe(pubsub)
+
+    response = StreamingHttpResponse(events(state), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,111 @@
+# ppt_app/job_queue.py
+import time
+import logging
+
+from django_redis import get_redis_connection
+
+import config
+
+# Presentation ids waiting to be picked up by a worker
+PENDING_QUEUE_KEY = "ppt:jobs:pending"
+# Lower priority queue of the batch endpoint, only drained when the pending
+# queue is empty so interactive requests are not stuck behind a batch
+BATCH_QUEUE_KEY = "ppt:jobs:batch"
+# Presentation ids currently owned by a worker
+PROCESSING_QUEUE_KEY = "ppt:jobs:processing"
+# Lease deadline (unix timestamp) of every id in the processing list
+LEASES_KEY = "ppt:jobs:leases"
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def enqueue_presentation(presentation_id):
+    """Pushes a presentation id on the pending queue for the worker pool."""
+    get_connection().lpush(PENDING_QUEUE_KEY, str(presentation_id))
+    logging.info(f"presentation queued for generation, presentation_id: {presentation_id}")
+
+
+def enqueue_presentations(presentation_ids):
+    """Pushes the presentations of a batch on the low priority queue."""
+    pipe = get_connection().pipeline(transaction=False)
+    for i in range(0, len(presentation_ids), config.BATCH_ENQUEUE_CHUNK_SIZE):
+        chunk = presentation_ids[i : i + config.BATCH_ENQUEUE_CHUNK_SIZE]
+        pipe.lpush(BATCH_QUEUE_KEY, *[str(x) for x in chunk])
+    pipe.execute()
+    logging.info(f"presentation batch queued for generation, count: {len(presentation_ids)}")
+
+
+def claim_job(timeout=None):
+    """
+    Blocks until a job is available and atomically moves it to the processing
+    list, so a worker crash never loses it. Returns the presentation id or None
+    when the timeout expires. Batch jobs are only claimed while no
+    interactive job is pending.
+    """
+    conn = get_connection()
+    timeout = config.PPT_WORKER_POLL_TIMEOUT if timeout is None else timeout
+    job_id = conn.lmove(PENDING_QUEUE_KEY, PROCESSING_QUEUE_KEY, "RIGHT", "LEFT")
+    if job_id is None:
+        job_id = conn.lmove(BATCH_QUEUE_KEY, PROCESSING_QUEUE_KEY, "RIGHT", "LEFT")
+    if job_id is None:
+        job_id = conn.blmove(
+            PENDING_QUEUE_KEY, PROCESSING_QUEUE_KEY, timeout, "RIGHT", "LEFT"
+        )
+    if job_id is None:
+        return None
+    job_id = job_id.decode()
+    conn.zadd(LEASES_KEY, {job_id: time.time() + config.PPT_JOB_LEASE_SECONDS})
+    return job_id
+
+
+def extend_lease(job_id):
+    """Heartbeat for a job that is still being processed."""
+    get_connection().zadd(
+        LEASES_KEY, {job_id: time.time() + config.PPT_JOB_LEASE_SECONDS}, xx=True
+    )
+
+
+def ack_job(job_id):
+    """Removes a finished (or failed) job from the processing list."""
+    pipe = get_connection().pipeline()
+    pipe.lrem(PROCESSING_QUEUE_KEY, 1, job_id)
+    pipe.zrem(LEASES_KEY, job_id)
+    pipe.execute()
+
+
+def requeue_expired_jobs():
+    """
+    Puts jobs whose lease expired (their worker died or was restarted) back on
+    the pending queue. Returns the requeued presentation ids.
+    """
+    conn = get_connection()
+    now = time.time()
+
+    # A worker may die between BLMOVE and ZADD, give such jobs a lease so they
+    # are picked up by a later sweep instead of staying orphaned forever.
+    processing = [job_id.decode() for job_id in conn.lrange(PROCESSING_QUEUE_KEY, 0, -1)]
+    for job_id in processing:
+        conn.zadd(LEASES_KEY, {job_id: now + config.PPT_JOB_LEASE_SECONDS}, nx=True)
+
+    requeued = []
+    for job_id in conn.zrangebyscore(LEASES_KEY, 0, now):
+        job_id = job_id.decode()
+        # Only the sweeper that removes the lease requeues the job
+        if conn.zrem(LEASES_KEY, job_id):
+            pipe = conn.pipeline()
+            pipe.lrem(PROCESSING_QUEUE_KEY, 1, job_id)
+            pipe.rpush(PENDING_QUEUE_KEY, job_id)
+            pipe.execute()
+            requeued.append(job_id)
+            logging.warning(f"requeued expired job, presentation_id: {job_id}")
+    return requeued
+
+
+def queue_depth():
+    return get_connection().llen(PENDING_QUEUE_KEY)
+
+
+def batch_queue_depth():
+    return get_connection().llen(BATCH_QUEUE_KEY)
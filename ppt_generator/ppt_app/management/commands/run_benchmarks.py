@@ -0,0 +1,110 @@
+# ppt_app/management/commands/run_benchmarks.py
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+import config
+from utils.openai_utils import reset_openai_clients
+from benchmarks.fake_services import FakeServices
+from benchmarks.suite import compare, run_suite
+
+
+def parse_sizes(value):
+    return [int(x) for x in value.split(",") if x]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks generation, rendering and downloads against local OpenAI and "
+        "Pexels stand-ins. Uses the configured database and Redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--decks", type=int, default=20, help="Decks generated end to end.")
+        parser.add_argument("--slides", type=int, default=10, help="Slides per generated deck.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Parallel generations.")
+        parser.add_argument(
+            "--deck-sizes",
+            type=parse_sizes,
+            default=[5, 10, 20],
+            help="Comma separated deck sizes of the render benchmark.",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Renders per deck size.")
+        parser.add_argument("--downloads", type=int, default=20, help="Warm download requests.")
+        parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds before a completion.")
+        parser.add_argument("--search-latency", type=float, default=0.05, help="Seconds per Pexels search.")
+        parser.add_argument("--image-latency", type=float, default=0.05, help="Seconds per image download.")
+        parser.add_argument("--streaming", action="store_true", help="Benchmark OPENAI_STREAMING.")
+        parser.add_argument("--output", help="Writes the JSON report to this file.")
+        parser.add_argument("--baseline", help="JSON report to compare with.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="Relative slowdown reported as a regression (0.1 for 10%%).",
+        )
+
+    def handle(self, *args, **options):
+        with FakeServices(
+            llm_latency=options["llm_latency"],
+            search_latency=options["search_latency"],
+            image_latency=options["image_latency"],
+        ) as services:
+            config.OPENAI_BASE_URL = services.openai_base_url
+            config.OPENAI_API_KEY = config.OPENAI_API_KEY or "benchmark"
+            config.PEXELS_API_URL = services.pexels_api_url
+            config.OPENAI_STREAMING = options["streaming"]
+            # Every completion must reach the stand-in
+            config.LLM_CACHE_ENABLED = False
+            reset_openai_clients()
+
+            results = run_suite(
+                decks=options["decks"],
+                num_slides=options["slides"],
+                concurrency=options["concurrency"],
+                deck_sizes=options["deck_sizes"],
+                repeat=options["repeat"],
+                download_requests=options["downloads"],
+                images_url=services.images_url,
+            )
+
+        report = {
+            "created": now().isoformat(),
+            "python": platform.python_version(),
+            "options": {
+                key: options[key]
+                for key in (
+                    "decks", "slides", "concurrency", "deck_sizes", "repeat", "downloads",
+                    "llm_latency", "search_latency", "image_latency", "streaming",
+                )
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+
+        if not options["baseline"]:
+            for metric, value in results.items():
+                self.stdout.write(f"{metric:<40} {value:>12}")
+            return
+
+        with open(options["baseline"]) as f:
+            baseline = json.load(f)
+        if baseline.get("options") != report["options"]:
+            self.stderr.write("The baseline was run with other options, results may not be comparable")
+
+        regressions = []
+        self.stdout.write(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+        for metric, before, after, change, regressed in compare(
+            results, baseline["results"], options["tolerance"]
+        ):
+            line = f"{metric:<40} {before:>12} {after:>12} {change:>+8.1%}"
+            if regressed:
+                regressions.append(metric)
+                line = self.style.ERROR(f"{line}  regression")
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
@@ -0,0 +1,157 @@
+# ppt_app/management/commands/run_load_test.py
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import subprocess
+from contextlib import ExitStack
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import CustomUser
+from benchmarks.fake_services import FakeServices
+from benchmarks.load_test import DEFAULT_MIX, LoadTest, parse_mix
+
+
+def get_free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise CommandError(f"The server did not start within {timeout}s: {url}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tests the presentation API with concurrent users. Without --url, "
+        "starts a local server and worker pool backed by OpenAI and Pexels stand-ins."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Base URL of a running server to test.")
+        parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users.")
+        parser.add_argument("--duration", type=float, default=60, help="Seconds of load.")
+        parser.add_argument("--ramp-up", type=float, default=5, help="Seconds to start every user.")
+        parser.add_argument(
+            "--mix",
+            type=parse_mix,
+            default=DEFAULT_MIX,
+            help="Weighted actions of the users, e.g. create=1,status=6,list=1,download=2.",
+        )
+        parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between actions.")
+        parser.add_argument("--server-workers", type=int, default=2, help="Server processes (local server).")
+        parser.add_argument("--concurrency", type=int, default=4, help="Generation workers (local server).")
+        parser.add_argument(
+            "--throttle-rate",
+            default="100000/minute",
+            help="USER_THROTTLE_RATE of the local server, the default keeps throttling out of the way.",
+        )
+        parser.add_argument("--llm-latency", type=float, default=2.0, help="Seconds before a completion.")
+        parser.add_argument("--search-latency", type=float, default=0.05, help="Seconds per Pexels search.")
+        parser.add_argument("--image-latency", type=float, default=0.05, help="Seconds per image download.")
+        parser.add_argument("--output", help="Writes the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        # Users are created in the configured database, which the tested
+        # server must share
+        password = "load-test-password"
+        credentials = []
+        for i in range(options["users"]):
+            user, _ = CustomUser.objects.get_or_create(email=f"load-test-{i}@localhost")
+            user.set_password(password)
+            user.save()
+            credentials.append((user.email, password))
+
+        with ExitStack() as stack:
+            url = options["url"] or self.start_local_server(stack, options)
+            self.stdout.write(
+                f"Running {options['users']} users for {options['duration']}s against {url}"
+            )
+            load_test = LoadTest(
+                url,
+                credentials,
+                duration=options["duration"],
+                mix=options["mix"],
+                think_time=options["think_time"],
+                ramp_up=options["ramp_up"],
+            )
+            report = asyncio.run(load_test.run())
+
+        if not report:
+            raise CommandError("No request was sent")
+        self.write_report(report)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+
+    def start_local_server(self, stack, options):
+        services = stack.enter_context(
+            FakeServices(
+                llm_latency=options["llm_latency"],
+                search_latency=options["search_latency"],
+                image_latency=options["image_latency"],
+            )
+        )
+        env = {
+            **os.environ,
+            "OPENAI_BASE_URL": services.openai_base_url,
+            "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "load-test",
+            "PEXELS_API_URL": services.pexels_api_url,
+            "USER_THROTTLE_RATE": options["throttle_rate"],
+            "DJANGO_ALLOWED_HOSTS": "127.0.0.1,localhost",
+            "LLM_CACHE_ENABLED": "False",
+        }
+        port = get_free_port()
+        commands = [
+            [
+                sys.executable, "-m", "uvicorn", "ppt_generator.asgi:application",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(options["server_workers"]), "--log-level", "warning",
+            ],
+            [
+                sys.executable, "manage.py", "run_presentation_workers",
+                "--concurrency", str(options["concurrency"]),
+            ],
+        ]
+        for command in commands:
+            process = subprocess.Popen(
+                command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL
+            )
+            stack.callback(self.stop_process, process)
+
+        url = f"http://127.0.0.1:{port}"
+        wait_until_up(url, timeout=30)
+        return url
+
+    def stop_process(self, process):
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def write_report(self, report):
+        self.stdout.write(
+            f"{'endpoint':<10} {'requests':>9} {'rps':>8} {'errors':>8} "
+            f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses"
+        )
+        for endpoint, stats in report.items():
+            line = (
+                f"{endpoint:<10} {stats['requests']:>9} {stats['rps']:>8} "
+                f"{stats['error_rate']:>8.1%} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+                f"{stats['p99_ms']:>9}  {stats['statuses']}"
+            )
+            self.stdout.write(self.style.ERROR(line) if stats["error_rate"] else line)
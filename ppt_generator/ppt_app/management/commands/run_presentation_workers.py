@@ -0,0 +1,124 @@
+# ppt_app/management/commands/run_presentation_workers.py
+import signal
+import logging
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from prometheus_client import start_http_server
+from redis.exceptions import RedisError
+
+import config
+from ppt_app import job_queue
+from ppt_app.models import Presentation
+from ppt_app.views import process_presentation_obj
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of workers generating the queued presentations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=config.PPT_WORKER_CONCURRENCY,
+            help="Number of presentations generated in parallel by this process.",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=None,
+            help="Serves the Prometheus metrics of this process on this port.",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        self.stop_event = threading.Event()
+        self.in_flight = set()
+        self.in_flight_lock = threading.Lock()
+
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+
+        self.recover_expired_jobs()
+
+        if options.get("metrics_port"):
+            start_http_server(options["metrics_port"])
+
+        threads = [
+            threading.Thread(target=self.work, name=f"ppt-worker-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Started {concurrency} presentation workers")
+
+        # The main thread keeps leases of running jobs alive and requeues the
+        # jobs of dead workers
+        heartbeat = max(config.PPT_JOB_LEASE_SECONDS // 3, 1)
+        while not self.stop_event.wait(heartbeat):
+            self.extend_leases()
+            self.recover_expired_jobs()
+
+        self.stdout.write("Stopping, waiting for running jobs to finish")
+        for thread in threads:
+            thread.join()
+
+    def request_stop(self, signum, frame):
+        self.stop_event.set()
+
+    def extend_leases(self):
+        with self.in_flight_lock:
+            job_ids = list(self.in_flight)
+        for job_id in job_ids:
+            try:
+                job_queue.extend_lease(job_id)
+            except RedisError as e:
+                logging.error(f"Error extending the lease, presentation_id: {job_id}, Error: {e}")
+
+    def recover_expired_jobs(self):
+        # Errors are logged and the next heartbeat tries again
+        try:
+            job_ids = job_queue.requeue_expired_jobs()
+            if job_ids:
+                # Their worker died mid-generation, let the next one start over
+                Presentation.objects.filter(id__in=job_ids, status="in_progress").update(
+                    status="pending"
+                )
+        except (RedisError, DatabaseError) as e:
+            logging.error(f"Error recovering expired jobs, Error: {e}")
+
+    def work(self):
+        while not self.stop_event.is_set():
+            try:
+                job_id = job_queue.claim_job()
+            except RedisError as e:
+                # The worker keeps running and retries once Redis is back
+                logging.error(
+                    f"Error claiming a job, retrying in {config.PPT_WORKER_RETRY_DELAY}s, Error: {e}"
+                )
+                self.stop_event.wait(config.PPT_WORKER_RETRY_DELAY)
+                continue
+            if job_id is None:
+                continue
+
+            with self.in_flight_lock:
+                self.in_flight.add(job_id)
+            close_old_connections()
+            try:
+                presentation = Presentation.objects.filter(id=job_id).first()
+                if presentation is None:
+                    logging.warning(f"queued presentation no longer exists, presentation_id: {job_id}")
+                else:
+                    process_presentation_obj(presentation)
+            except Exception as e:
+                logging.error(f"Error running job for presentation_id: {job_id}, Error: {e}")
+            finally:
+                try:
+                    job_queue.ack_job(job_id)
+                except RedisError as e:
+                    # The lease expires and the job is requeued, its claim then fails
+                    logging.error(f"Error acknowledging job, presentation_id: {job_id}, Error: {e}")
+                with self.in_flight_lock:
+                    self.in_flight.discard(job_id)
+                close_old_connections()
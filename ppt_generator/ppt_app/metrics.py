@@ -0,0 +1,89 @@
+# ppt_app/metrics.py
+import hmac
+import time
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from prometheus_client.core import GaugeMetricFamily
+from redis.exceptions import RedisError
+
+import config
+from utils.metrics import HTTP_REQUEST_DURATION, render_metrics
+from . import job_queue
+from .models import Presentation
+
+
+class GenerationStateCollector:
+    """Queue depths and running generations, read at scrape time."""
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        queue_depth = GaugeMetricFamily(
+            "ppt_queue_depth", "Presentations waiting for a worker.", labels=["queue"]
+        )
+        try:
+            queue_depth.add_metric(["pending"], job_queue.queue_depth())
+            queue_depth.add_metric(["batch"], job_queue.batch_queue_depth())
+        except RedisError as e:
+            logging.warning(f"Error reading the queue depth: {e}")
+        yield queue_depth
+
+        yield GaugeMetricFamily(
+            "ppt_presentations_in_progress",
+            "Presentations being generated.",
+            value=Presentation.objects.filter(status="in_progress").count(),
+        )
+
+
+def is_authorized(request):
+    """Bearer METRICS_TOKEN when configured, local scrapes only otherwise."""
+    if not config.METRICS_TOKEN:
+        return request.META.get("REMOTE_ADDR") in ("127.0.0.1", "::1")
+    authorization = request.headers.get("Authorization", "")
+    return hmac.compare_digest(authorization, f"Bearer {config.METRICS_TOKEN}")
+
+
+@require_GET
+def metrics_view(request):
+    if not is_authorized(request):
+        return HttpResponse(status=403)
+    data, content_type = render_metrics(GenerationStateCollector())
+    return HttpResponse(data, content_type=content_type)
+
+
+class MetricsMiddleware:
+    """Records the duration of every request in ppt_http_request_duration_seconds."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, start)
+        return response
+
+    def observe(self, request, response, start):
+        # Labelled by route name, not path, to keep the cardinality bounded
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        HTTP_REQUEST_DURATION.labels(view, request.method, response.status_code).observe(
+            time.perf_counter() - start
+        )
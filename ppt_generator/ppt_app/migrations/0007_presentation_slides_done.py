@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ppt_app', '0006_remove_presentationslide_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presentation',
+            name='slides_done',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
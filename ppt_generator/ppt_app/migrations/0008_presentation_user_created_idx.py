@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ppt_app', '0007_presentation_slides_done'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='presentation',
+            index=models.Index(fields=['user', '-create_time', '-id'], name='presentation_user_created_idx'),
+        ),
+    ]
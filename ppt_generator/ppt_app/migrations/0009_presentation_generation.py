@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ppt_app', '0008_presentation_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presentation',
+            name='generation',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
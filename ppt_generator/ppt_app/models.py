@@ -1,6 +1,11 @@
+import copy
+
 from django.db import models
+from django.db.models import F
+from django.utils.timezone import now
 from django.core.validators import MinValueValidator, MaxValueValidator
-from jsonschema import validate, ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 
 from accounts.models import CustomUser, AbstractBaseModel
 
@@ -57,6 +62,16 @@ theme_schema = {
     "required": ["fonts", "font_sizes", "colors"],
 }
 
+# Compiled once, validate() would check the schema and build a validator on
+# every call
+ThemeValidator = validator_for(theme_schema)
+ThemeValidator.check_schema(theme_schema)
+theme_validator = ThemeValidator(theme_schema)
+
+
+class StaleGenerationError(RuntimeError):
+    """The presentation was claimed again or its content changed, see Presentation.generation."""
+
 
 class Presentation(AbstractBaseModel):
     STATUS_CHOICES = (
@@ -82,10 +97,35 @@ class Presentation(AbstractBaseModel):
         choices=STATUS_CHOICES,
         default="pending",  # Default status is 'pending'
     )
+    # Number of slides generated so far, out of num_slides
+    slides_done = models.PositiveIntegerField(default=0)
+    # Bumped by every claim of a worker and every content change, results of
+    # an older generation are discarded
+    generation = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the presentation list of a user
+            models.Index(
+                fields=["user", "-create_time", "-id"],
+                name="presentation_user_created_idx",
+            ),
+        ]
+
+    # Statuses a worker can start generating from, see claim
+    CLAIMABLE_STATUSES = ["pending", "failed"]
 
     def __str__(self):
         return f"{self.user} <> {self.topic}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the stored theme, saves skip its validation while unchanged
+        if "theme" not in instance.get_deferred_fields():
+            instance._loaded_theme = copy.deepcopy(instance.theme)
+        return instance
+
     def set_defaults(self, data, defaults):
         for key, value in defaults.items():
             if isinstance(
@@ -108,15 +148,74 @@ class Presentation(AbstractBaseModel):
         }
         self.theme = self.set_defaults(self.theme, default_theme)
 
-    def save(self, *args, **kwargs):
+    def clean_theme(self):
         self.set_default_theme()
 
-        try:
-            validate(instance=self.theme, schema=theme_schema)
-        except ValidationError as e:
-            raise ValueError(f"Invalid theme data: {e.message}")
+        error = best_match(theme_validator.iter_errors(self.theme))
+        if error is not None:
+            raise ValueError(f"Invalid theme data: {error.message}")
+
+    def theme_needs_validation(self, update_fields=None):
+        if update_fields is not None and "theme" not in update_fields:
+            return False
+        if "theme" in self.get_deferred_fields():
+            return False
+        return self._state.adding or self.theme != getattr(self, "_loaded_theme", None)
+
+    def save(self, *args, **kwargs):
+        if self.theme_needs_validation(kwargs.get("update_fields")):
+            self.clean_theme()
 
         super(Presentation, self).save(*args, **kwargs)
+        if "theme" not in self.get_deferred_fields():
+            self._loaded_theme = copy.deepcopy(self.theme)
+
+    def claim(self):
+        """
+        Atomically moves a pending or failed presentation to in_progress under
+        a new generation, a compare-and-set on the generation this instance
+        was loaded with. Returns whether the caller owns the generation, only
+        one of concurrent claims (and none after a content change) does.
+        """
+        generation = self.generation + 1
+        update_time = now()
+        claimed = Presentation.objects.filter(
+            id=self.id, generation=self.generation, status__in=self.CLAIMABLE_STATUSES
+        ).update(status="in_progress", slides_done=0, generation=generation, update_time=update_time)
+        if claimed:
+            self.status = "in_progress"
+            self.slides_done = 0
+            self.generation = generation
+            self.update_time = update_time
+        return bool(claimed)
+
+    def update_if_current(self, **fields):
+        """
+        Writes the fields (and update_time) as a single UPDATE, unless the
+        generation moved on since this instance was loaded or claimed. Inside
+        a transaction the row stays locked until commit, claims and content
+        changes wait for it. Returns False when nothing was written.
+        """
+        fields["update_time"] = now()
+        updated = Presentation.objects.filter(id=self.id, generation=self.generation).update(**fields)
+        if updated:
+            for name, value in fields.items():
+                setattr(self, name, value)
+        return bool(updated)
+
+    def set_status(self, status):
+        """Writes a status transition (and progress) of the current generation."""
+        return self.update_if_current(status=status, slides_done=self.slides_done)
+
+    def restart_generation(self):
+        """
+        Back to pending after a content change, under a new generation so that
+        a generation of the previous content still running gets discarded.
+        """
+        Presentation.objects.filter(id=self.id).update(
+            status="pending", slides_done=0, generation=F("generation") + 1, update_time=now()
+        )
+        self.refresh_from_db(fields=["status", "slides_done", "generation", "update_time"])
 
 
 class PresentationSlide(models.Model):
@@ -0,0 +1,73 @@
+# ppt_app/notifications.py
+import json
+import asyncio
+import logging
+import weakref
+
+import redis.asyncio
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+# Statuses after which a presentation does not change until the next update
+FINAL_STATUSES = ("completed", "failed")
+
+# One async Redis connection pool per event loop
+_async_connections = weakref.WeakKeyDictionary()
+
+
+def get_channel(presentation_id):
+    return f"ppt:presentation:{presentation_id}"
+
+
+def get_presentation_state(presentation):
+    return {
+        "id": str(presentation.id),
+        "status": presentation.status,
+        "slides_done": presentation.slides_done,
+        "num_slides": presentation.num_slides,
+    }
+
+
+def publish_presentation_state(presentation):
+    """Notifies the subscribers of the presentation of its status and progress."""
+    state = get_presentation_state(presentation)
+    try:
+        get_redis_connection("default").publish(
+            get_channel(presentation.id), json.dumps(state)
+        )
+    except RedisError as e:
+        logging.warning(f"Error publishing state, presentation_id: {presentation.id}, Error: {e}")
+
+
+def get_async_connection():
+    loop = asyncio.get_running_loop()
+    connection = _async_connections.get(loop)
+    if connection is None:
+        connection = redis.asyncio.Redis.from_url(settings.CACHES["default"]["LOCATION"])
+        _async_connections[loop] = connection
+    return connection
+
+
+async def subscribe(presentation_id):
+    pubsub = get_async_connection().pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(get_channel(presentation_id))
+    return pubsub
+
+
+async def next_state(pubsub, timeout):
+    """Waits up to `timeout` seconds for the next published state, or None."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while (remaining := deadline - loop.time()) > 0:
+        message = await pubsub.get_message(timeout=remaining)
+        if message is not None and message["type"] == "message":
+            return json.loads(message["data"])
+    return None
+
+
+async def unsubscribe(pubsub):
+    try:
+        await pubsub.unsubscribe()
+    finally:
+        await pubsub.aclose()
@@ -0,0 +1,74 @@
+# ppt_app/pagination.py
+import json
+import uuid
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+import config
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj):
+    payload = json.dumps([obj.create_time.isoformat(), str(obj.id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        create_time, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        create_time = parse_datetime(create_time)
+        id = uuid.UUID(id)
+    except (binascii.Error, AttributeError, TypeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    if create_time is None:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return create_time, id
+
+
+def get_page_size(value):
+    try:
+        page_size = int(value) if value else config.PAGE_SIZE
+    except ValueError:
+        page_size = config.PAGE_SIZE
+    return max(1, min(page_size, config.MAX_PAGE_SIZE))
+
+
+def get_keyset_queryset(queryset, cursor=None, page_size=None):
+    """
+    Orders `queryset` newest first and seeks it past the cursor on
+    (create_time, id), so the cost of a page does not depend on its depth.
+    One extra row is fetched to detect the last page.
+    """
+    queryset = queryset.order_by("-create_time", "-id")
+    if cursor:
+        create_time, id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(create_time__lt=create_time) | Q(create_time=create_time, id__lt=id)
+        )
+    return queryset[: page_size + 1]
+
+
+def get_keyset_page(rows, page_size):
+    """Returns the page and the cursor of the next one (None on the last page)."""
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def keyset_paginate(queryset, cursor=None, page_size=None):
+    page_size = get_page_size(page_size)
+    rows = list(get_keyset_queryset(queryset, cursor, page_size))
+    return get_keyset_page(rows, page_size)
+
+
+async def akeyset_paginate(queryset, cursor=None, page_size=None):
+    page_size = get_page_size(page_size)
+    rows = [row async for row in get_keyset_queryset(queryset, cursor, page_size)]
+    return get_keyset_page(rows, page_size)
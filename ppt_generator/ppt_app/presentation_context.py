@@ -1,3 +1,5 @@
+import copy
+
 presentation_context = """
     You are a PowerPoint Presentation Generator agent. Your role is to create professional, well-structured PowerPoint presentations based on a topic and description provided by the user. The presentation must maintain consistency in storytelling, bullet point counts, and word counts across all slides.
 
@@ -150,3 +152,16 @@ presentation_tools = [
         },
     }
 ]
+
+
+def get_slide_tools():
+    """generate_pptx narrowed down to a single slide, for slide regeneration."""
+    tools = copy.deepcopy(presentation_tools)
+    function = tools[0]["function"]
+    function["name"] = "generate_slide"
+    function["description"] = "Generates a single slide of a PowerPoint presentation."
+    function["parameters"] = function["parameters"]["properties"]["slides"]["items"]
+    return tools
+
+
+slide_tools = get_slide_tools()
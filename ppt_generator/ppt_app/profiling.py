@@ -0,0 +1,69 @@
+# ppt_app/profiling.py
+import re
+import hmac
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+import config
+from utils.profiling import capture_profile, should_sample
+
+# Request ids become file names
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def is_profiling_requested(request):
+    """The X-Profile header holds PROFILING_TOKEN."""
+    token = request.headers.get("X-Profile")
+    return bool(
+        token and config.PROFILING_TOKEN and hmac.compare_digest(token, config.PROFILING_TOKEN)
+    )
+
+
+def get_request_id(request):
+    request_id = request.headers.get("X-Request-ID", "")
+    return request_id if REQUEST_ID_RE.match(request_id) else uuid.uuid4().hex
+
+
+class ProfilingMiddleware:
+    """
+    Profiles sampled requests and those asking for it, see
+    utils.profiling.capture_profile. Removed from the stack when
+    PROFILING_ENABLED is off. Async requests are profiled on the event loop
+    thread, the capture includes the other requests it served meanwhile.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not config.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not (is_profiling_requested(request) or should_sample()):
+            return self.get_response(request)
+
+        profile_id = f"request-{get_request_id(request)}"
+        with capture_profile(profile_id, label=f"{request.method} {request.path}") as captured:
+            response = self.get_response(request)
+        if captured:
+            response["X-Profile-Id"] = profile_id
+        return response
+
+    async def __acall__(self, request):
+        if not (is_profiling_requested(request) or should_sample()):
+            return await self.get_response(request)
+
+        profile_id = f"request-{get_request_id(request)}"
+        with capture_profile(profile_id, label=f"{request.method} {request.path}") as captured:
+            response = await self.get_response(request)
+        if captured:
+            response["X-Profile-Id"] = profile_id
+        return response
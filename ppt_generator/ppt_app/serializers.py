@@ -1,11 +1,30 @@
 # ppt_app/serializers.py
+from django.db import transaction
 from rest_framework import serializers
-from .models import Presentation
+
+import config
+from .models import Presentation, PresentationSlide
+
+
+class PresentationListSerializer(serializers.ListSerializer):
+    """Creates the presentations of a batch with a single bulk INSERT."""
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        presentations = [Presentation(user=user, **item) for item in validated_data]
+        for presentation in presentations:
+            # bulk_create() bypasses Presentation.save()
+            presentation.clean_theme()
+        with transaction.atomic():
+            return Presentation.objects.bulk_create(
+                presentations, batch_size=config.BATCH_ENQUEUE_CHUNK_SIZE
+            )
 
 
 class PresentationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Presentation
+        list_serializer_class = PresentationListSerializer
         fields = [
             "id",
             "topic",
@@ -15,10 +34,43 @@ class PresentationSerializer(serializers.ModelSerializer):
             "create_time",
             "update_time",
             "status",
+            "slides_done",
         ]
-        read_only_fields = ["id", "create_time", "update_time", "status"]
+        read_only_fields = ["id", "create_time", "update_time", "status", "slides_done"]
 
     def create(self, validated_data):
         # Manually add the user to the validated_data before saving
         validated_data["user"] = self.context["request"].user
         return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Only the changed fields are written, status, progress and generation
+        # belong to the workers
+        instance.save(update_fields=[*validated_data, "update_time"])
+        return instance
+
+
+class PresentationSummarySerializer(serializers.ModelSerializer):
+    """Lightweight representation used by the presentation list."""
+
+    class Meta:
+        model = Presentation
+        fields = [
+            "id",
+            "topic",
+            "num_slides",
+            "create_time",
+            "update_time",
+            "status",
+            "slides_done",
+        ]
+        read_only_fields = fields
+
+
+class PresentationSlideSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PresentationSlide
+        fields = ["index", "layout_id", "layout_name", "content"]
+        read_only_fields = fields
@@ -0,0 +1,147 @@
+# ppt_app/single_flight.py
+import json
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError, WatchError
+
+import config
+
+KEY_PREFIX = "ppt:single-flight:"
+
+
+class SingleFlightError(RuntimeError):
+    """The call was coalesced with another one which failed."""
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def get_lock_key(key):
+    return f"{KEY_PREFIX}{key}:lock"
+
+
+def get_result_key(key):
+    return f"{KEY_PREFIX}{key}:result"
+
+
+def get_channel(key):
+    return f"{KEY_PREFIX}{key}:done"
+
+
+def run_once(key, fn, abandon_on=()):
+    """
+    Calls `fn` once for all the concurrent callers sharing `key`, across
+    processes. The first caller takes a Redis lock and runs `fn`, the others
+    wait for its JSON serializable result, which is kept for
+    GENERATION_RESULT_TTL seconds so late duplicates reuse it as well.
+
+    Returns `(result, leader)`, `leader` being True for the caller that ran
+    `fn`. When the leader fails its followers get a SingleFlightError. The
+    lock is renewed while `fn` runs, when the leader dies it expires after
+    GENERATION_LOCK_TIMEOUT seconds and one of the followers takes over. An exception listed in
+    `abandon_on` only concerns the leader, which is then treated as dead: the
+    lock is released right away and the exception re-raised to it alone.
+    """
+    conn = get_connection()
+    lock_key = get_lock_key(key)
+    result_key = get_result_key(key)
+
+    pubsub = conn.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(get_channel(key))
+    try:
+        while True:
+            # Checked after subscribing, a result published in between is not missed
+            cached = conn.get(result_key)
+            if cached is not None:
+                return json.loads(cached), False
+
+            token = uuid.uuid4().hex
+            if conn.set(lock_key, token, nx=True, ex=config.GENERATION_LOCK_TIMEOUT):
+                return _run_leader(conn, key, token, fn, abandon_on), True
+
+            message = pubsub.get_message(timeout=config.GENERATION_POLL_INTERVAL)
+            if message and message["data"] not in (b"ok", b"abandoned"):
+                raise SingleFlightError(message["data"].decode())
+    finally:
+        pubsub.close()
+
+
+def _run_leader(conn, key, token, fn, abandon_on=()):
+    try:
+        with _keep_lock(conn, get_lock_key(key), token):
+            result = fn()
+    except abandon_on:
+        # Released before waking the followers up, one of them takes over
+        _release_lock(conn, get_lock_key(key), token)
+        conn.publish(get_channel(key), "abandoned")
+        raise
+    except Exception as e:
+        conn.publish(get_channel(key), f"{type(e).__name__}: {e}")
+        raise
+    else:
+        conn.set(get_result_key(key), json.dumps(result), ex=config.GENERATION_RESULT_TTL)
+        conn.publish(get_channel(key), "ok")
+        return result
+    finally:
+        _release_lock(conn, get_lock_key(key), token)
+
+
+@contextmanager
+def _keep_lock(conn, lock_key, token):
+    """
+    Renews the lock every third of GENERATION_LOCK_TIMEOUT while the block
+    runs, a generation can take longer than the timeout (OpenAI retries,
+    image searches).
+    """
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(config.GENERATION_LOCK_TIMEOUT / 3):
+            try:
+                if not _extend_lock(conn, lock_key, token):
+                    logging.warning(f"single-flight lock lost while running, key: {lock_key}")
+                    return
+            except RedisError as e:
+                logging.warning(f"Error renewing single-flight lock, key: {lock_key}, Error: {e}")
+
+    thread = threading.Thread(target=renew, name="single-flight-renew", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _extend_lock(conn, lock_key, token):
+    # Same check-and-set as _release_lock, the lock may have been taken over
+    with conn.pipeline() as pipe:
+        try:
+            pipe.watch(lock_key)
+            if pipe.get(lock_key) != token.encode():
+                return False
+            pipe.multi()
+            pipe.expire(lock_key, config.GENERATION_LOCK_TIMEOUT)
+            pipe.execute()
+            return True
+        except WatchError:
+            return False
+
+
+def _release_lock(conn, lock_key, token):
+    # Only delete the lock if it is still ours, it may have expired and been
+    # taken by another caller in the meantime
+    with conn.pipeline() as pipe:
+        try:
+            pipe.watch(lock_key)
+            if pipe.get(lock_key) == token.encode():
+                pipe.multi()
+                pipe.delete(lock_key)
+                pipe.execute()
+        except WatchError:
+            logging.warning(f"single-flight lock changed while releasing it, key: {lock_key}")
@@ -1,3 +1,370 @@
-from django.test import TestCase
+import io
+import json
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.test import SimpleTestCase, TestCase
+from PIL import Image
+from rest_framework.test import APIClient
+
+import config
+from accounts.models import CustomUser
+from ppt_app.management.commands.run_presentation_workers import Command
+from ppt_app.models import Presentation, PresentationSlide, StaleGenerationError
+from ppt_app.views import process_presentation_obj, replace_presentation_slides
+from utils.json_stream import JSONArrayStreamParser
+from utils.ppt_utils import (
+    generate_pptx_spooled,
+    generate_pptx_strem,
+    get_image_urls,
+    get_list_font_size,
+    get_uncached_slides,
+)
+from utils.slide_cache import is_slide_cached, slide_part_cache
+
+
+def get_slides(title, num_slides=2):
+    return [
+        {
+            "layout_id": 1,
+            "layout_name": "Title and Content",
+            "content": [
+                {"name": "Title 1", "value": f"{title} {i}"},
+                {"name": "Content Placeholder 2", "value": ["First", "Second"]},
+            ],
+        }
+        for i in range(num_slides)
+    ]
+
+
+def get_picture_slide(image_url):
+    return {
+        "layout_id": 8,
+        "layout_name": "Picture with Caption",
+        "content": [
+            {"name": "Title 1", "value": "Picture"},
+            {"name": "Picture Placeholder 2", "value": "a red bicycle", "image_url": image_url},
+            {"name": "Text Placeholder 3", "value": "Caption"},
+        ],
+    }
+
+
+def split(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class JSONArrayStreamParserTests(SimpleTestCase):
+    def parse(self, fragments):
+        parser = JSONArrayStreamParser()
+        return [parser.feed(fragment) for fragment in fragments]
+
+    def test_split_fragments(self):
+        slides = get_slides("Slide", num_slides=3)
+        text = json.dumps({"slides": slides})
+        for size in (1, 7, len(text)):
+            with self.subTest(size=size):
+                parsed = self.parse(split(text, size))
+                self.assertEqual([item for items in parsed for item in items], slides)
+
+    def test_items_returned_when_complete(self):
+        parsed = self.parse(['{"slides": [{"a": 1}, {"b"', ': 2}', "]}"])
+        self.assertEqual(parsed, [[{"a": 1}], [{"b": 2}], []])
+
+    def test_escaped_quotes_and_braces_in_strings(self):
+        items = [
+            {"value": 'He said "{hi}" [twice]'},
+            {"value": "ends with a backslash \\", "list": ["}", "{", "]"]},
+            {"nested": {"inner": [{"x": "}"}]}},
+        ]
+        text = json.dumps({"slides": items})
+        self.assertIn('\\"{hi}\\"', text)
+        for size in (1, 3):
+            with self.subTest(size=size):
+                parsed = self.parse(split(text, size))
+                self.assertEqual([item for items in parsed for item in items], items)
+
+
+@mock.patch.object(config, "SLIDE_PART_CACHE_ENABLED", True)
+class SlidePartCacheTests(SimpleTestCase):
+    image_url = "https://images.example/bicycle.jpg"
+
+    def setUp(self):
+        slide_part_cache.clear()
+        self.addCleanup(slide_part_cache.clear)
+        self.slides = get_slides("Cached", num_slides=3) + [get_picture_slide(self.image_url)]
+        image = io.BytesIO()
+        Image.new("RGB", (64, 48), (200, 30, 30)).save(image, format="JPEG")
+        self.images = {self.image_url: image.getvalue()}
+
+    def prefetch_images(self, image_urls):
+        return {x: self.images[x] for x in image_urls}
+
+    def render(self, render, *args):
+        # Zip entries are dated with the current time
+        with mock.patch("time.time", return_value=1700000000), mock.patch(
+            "utils.ppt_utils.prefetch_images", side_effect=self.prefetch_images
+        ) as prefetch:
+            pptx_stream, complete = render(*args)
+        self.assertTrue(complete)
+        pptx_stream.seek(0)
+        return pptx_stream.read(), prefetch
+
+    def test_cached_render_matches_full_render(self):
+        default_theme = Presentation(theme={})
+        default_theme.set_default_theme()
+        for theme in ({}, default_theme.theme):
+            with self.subTest(theme=theme):
+                slide_part_cache.clear()
+                with mock.patch.object(config, "SLIDE_PART_CACHE_ENABLED", False):
+                    full, _ = self.render(generate_pptx_strem, self.slides, theme)
+
+                self.render(generate_pptx_strem, self.slides, theme)
+                self.assertEqual(get_uncached_slides(self.slides, theme), [])
+                cached, prefetch = self.render(generate_pptx_strem, self.slides, theme)
+
+                prefetch.assert_not_called()
+                self.assertEqual(cached, full)
+
+    def test_evicted_slide_fetches_its_images(self):
+        first, _ = self.render(generate_pptx_spooled, self.slides, {})
+
+        # The download view prefetches the images of the uncached slides only,
+        # the picture slide is evicted before the deck is built
+        images = self.prefetch_images(get_image_urls(get_uncached_slides(self.slides, {})))
+        self.assertEqual(images, {})
+        slide_part_cache.clear()
+        second, prefetch = self.render(generate_pptx_spooled, self.slides, {}, images)
+
+        prefetch.assert_called_once_with([self.image_url])
+        self.assertEqual(second, first)
+
+    def test_legacy_error_image_url(self):
+        # Older rows hold the error message of the image search as image_url
+        slide = get_picture_slide("Error: no photo found")
+
+        with mock.patch("utils.ppt_utils.prefetch_images") as prefetch:
+            _, complete = generate_pptx_strem([slide], {})
+
+        prefetch.assert_not_called()
+        self.assertTrue(complete)
+        self.assertTrue(is_slide_cached(slide, get_list_font_size({})))
+
+    def test_image_download_timeout(self):
+        slide = get_picture_slide("https://images.example/timeout.jpg")
+
+        with mock.patch("utils.pexels_utils.requests.get", side_effect=requests.Timeout) as get:
+            _, complete = generate_pptx_strem([slide], {})
+
+        get.assert_called_once_with(slide["content"][1]["image_url"], timeout=config.HTTP_TIMEOUT)
+        # The picture is missing, the slide is rendered again by the next download
+        self.assertFalse(complete)
+        self.assertFalse(is_slide_cached(slide, get_list_font_size({})))
+
+
+@mock.patch.object(config, "GENERATION_COALESCING", False)
+@mock.patch.object(config, "OPENAI_STREAMING", False)
+@mock.patch("ppt_app.views.enqueue_presentation")
+@mock.patch("ppt_app.views.publish_presentation_state")
+class PresentationGenerationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(email="generation@example.com")
+        self.presentation = Presentation.objects.create(
+            user=self.user, topic="Topic", description="Description", num_slides=2, theme={}
+        )
+
+    def load(self):
+        return Presentation.objects.get(id=self.presentation.id)
+
+    def test_concurrent_claims(self, publish, enqueue):
+        first, second = self.load(), self.load()
+
+        self.assertTrue(first.claim())
+        self.assertFalse(second.claim())
+        presentation = self.load()
+        self.assertEqual(presentation.status, "in_progress")
+        self.assertEqual(presentation.generation, 1)
+
+    def test_completed_presentation_is_not_claimed(self, publish, enqueue):
+        with mock.patch("ppt_app.views.generate_pptx_from_openai", return_value=get_slides("A")):
+            self.assertTrue(process_presentation_obj(self.load()))
+            self.assertFalse(process_presentation_obj(self.load()))
+        self.assertEqual(self.load().generation, 1)
+
+    def test_streaming_generation(self, publish, enqueue):
+        slides = get_slides("Streamed")
+        slides.append(
+            {
+                "layout_id": 8,
+                "layout_name": "Picture with Caption",
+                "content": [
+                    {"name": "Title 1", "value": "Picture"},
+                    {"name": "Picture Placeholder 2", "value": "a red bicycle"},
+                    {"name": "Text Placeholder 3", "value": "Caption"},
+                ],
+            }
+        )
+        fragments = split(json.dumps({"slides": slides}), 5)
+
+        with mock.patch.object(config, "OPENAI_STREAMING", True), mock.patch(
+            "ppt_app.views.stream_tool_call_arguments", return_value=iter(fragments)
+        ), mock.patch(
+            "ppt_app.views.search_pexels_best_match_url", return_value="https://images.example/bicycle.jpg"
+        ) as search:
+            self.assertTrue(process_presentation_obj(self.load()))
+
+        presentation = self.load()
+        self.assertEqual(presentation.status, "completed")
+        self.assertEqual(presentation.slides_done, 3)
+        saved = PresentationSlide.objects.filter(presentation=presentation).order_by("index")
+        self.assertEqual([x.content[0]["value"] for x in saved], ["Streamed 0", "Streamed 1", "Picture"])
+        self.assertEqual(saved[2].content[1]["image_url"], "https://images.example/bicycle.jpg")
+        search.assert_called_once()
+        # in_progress, one update per slide, completed
+        self.assertEqual(publish.call_count, 5)
+
+    def test_stale_generation_discarded_after_put(self, publish, enqueue):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        def generate(topic, description, num_slides):
+            # The topic changes while the worker waits for the LLM
+            response = client.put(
+                f"/api/v1/presentations/{self.presentation.id}/", {"topic": "New topic"}, format="json"
+            )
+            self.assertEqual(response.status_code, 200)
+            return get_slides("Old")
+
+        with mock.patch("ppt_app.views.generate_pptx_from_openai", side_effect=generate):
+            self.assertFalse(process_presentation_obj(self.load()))
+
+        presentation = self.load()
+        self.assertEqual(presentation.status, "pending")
+        self.assertEqual(presentation.topic, "New topic")
+        self.assertEqual(presentation.generation, 2)
+        self.assertFalse(PresentationSlide.objects.filter(presentation=presentation).exists())
+        enqueue.assert_called_once_with(presentation.id)
+
+        with mock.patch("ppt_app.views.generate_pptx_from_openai", return_value=get_slides("New")):
+            self.assertTrue(process_presentation_obj(presentation))
+        self.assertEqual(self.load().status, "completed")
+        self.assertEqual(
+            PresentationSlide.objects.get(presentation=presentation, index=0).content[0]["value"],
+            "New 0",
+        )
+
+    def test_expired_job_recovery(self, publish, enqueue):
+        stale = self.load()
+        self.assertTrue(stale.claim())
+
+        # The lease of the first worker expired, the job is requeued
+        with mock.patch("ppt_app.job_queue.requeue_expired_jobs", return_value=[str(stale.id)]):
+            Command().recover_expired_jobs()
+        self.assertEqual(self.load().status, "pending")
+
+        with mock.patch("ppt_app.views.generate_pptx_from_openai", return_value=get_slides("New")):
+            self.assertTrue(process_presentation_obj(self.load()))
+
+        # The first worker finishes late, its slides are discarded
+        with self.assertRaises(StaleGenerationError):
+            replace_presentation_slides(stale, get_slides("Old", num_slides=3))
+        presentation = self.load()
+        self.assertEqual(presentation.status, "completed")
+        self.assertEqual(presentation.generation, 2)
+        slides = PresentationSlide.objects.filter(presentation=presentation).order_by("index")
+        self.assertEqual([x.content[0]["value"] for x in slides], ["New 0", "New 1"])
+
+    def test_failure_of_stale_generation_is_not_recorded(self, publish, enqueue):
+        stale = self.load()
+        self.assertTrue(stale.claim())
+        self.load().restart_generation()
+
+        self.assertFalse(stale.set_status("failed"))
+        self.assertEqual(self.load().status, "pending")
+
+
+@mock.patch("ppt_app.views.search_pexels_best_match_url", return_value="https://images.example/bicycle.jpg")
+class PresentationSlideViewTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(email="slides@example.com")
+        self.presentation = Presentation.objects.create(
+            user=self.user,
+            topic="Topic",
+            description="Description",
+            num_slides=2,
+            theme={},
+            status="completed",
+        )
+        for index, slide in enumerate(get_slides("Slide")):
+            PresentationSlide.objects.create(presentation=self.presentation, index=index, **slide)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/v1/presentations/{self.presentation.id}/slides/0/"
+
+    def put(self, data):
+        return self.client.put(self.url, data, format="json")
+
+    def assertUnchanged(self):
+        slide = PresentationSlide.objects.get(presentation=self.presentation, index=0)
+        self.assertEqual(slide.layout_id, 1)
+        self.assertEqual(slide.content[0]["value"], "Slide 0")
+
+    def test_invalid_layout(self, search):
+        content = get_slides("Edited", num_slides=1)[0]["content"]
+        for layout_id in (99, -1, "1", 1.0, True, None):
+            with self.subTest(layout_id=layout_id):
+                response = self.put({"layout_id": layout_id, "content": content})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data["detail"], "Invalid layout_id.")
+        self.assertUnchanged()
+
+    def test_invalid_placeholder_names(self, search):
+        value = {"name": "Content Placeholder 2", "value": ["Line"]}
+        for content in (
+            [{"value": "No name"}, value],
+            [{"name": 1, "value": "Number"}, value],
+            [{"name": "Title", "value": "Misspelled"}, value],
+            [{"name": "Title 1", "value": "Title"}],
+            [{"name": "Title 1", "value": "Title"}, value, {"name": "Footer 9", "value": "Extra"}],
+            "Title 1",
+        ):
+            with self.subTest(content=content):
+                response = self.put({"content": content})
+                self.assertEqual(response.status_code, 400)
+        self.assertUnchanged()
+        search.assert_not_called()
+
+    def test_image_url_is_dropped(self, search):
+        for image_url in ("file:///etc/passwd", "https://images.example/" + "a" * 5000):
+            with self.subTest(image_url=image_url):
+                search.reset_mock()
+                content = get_picture_slide(image_url)["content"]
+                with mock.patch("utils.pexels_utils.requests.get") as get:
+                    response = self.put({"layout_id": 8, "content": content})
+
+                self.assertEqual(response.status_code, 200)
+                # The picture is searched again, the given URL is neither stored nor fetched
+                search.assert_called_once()
+                self.assertEqual(search.call_args.args[0], "a red bicycle")
+                get.assert_not_called()
+                slide = PresentationSlide.objects.get(presentation=self.presentation, index=0)
+                self.assertEqual(slide.content[1]["image_url"], "https://images.example/bicycle.jpg")
+                self.assertNotIn(image_url, json.dumps(slide.content))
+
+    def test_valid_edit(self, search):
+        content = [
+            {"name": "Title 1", "value": "Edited"},
+            {"name": "Content Placeholder 2", "value": ["One", "Two", "Three"]},
+        ]
+        response = self.put({"content": content})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["layout_name"], "Title and Content")
+        self.assertEqual(
+            [x["value"] for x in response.data["content"]], ["Edited", ["One", "Two", "Three"]]
+        )
+        slide = PresentationSlide.objects.get(presentation=self.presentation, index=0)
+        self.assertEqual(slide.content, response.data["content"])
+        # The other slides are untouched
+        other = PresentationSlide.objects.get(presentation=self.presentation, index=1)
+        self.assertEqual(other.content[0]["value"], "Slide 1")
+        search.assert_not_called()
@@ -1,19 +1,61 @@
 # ppt_app/urls.py
 from django.urls import path
-from .views import PresentationView, PresentationDownloadView
+from . import async_views
+from .views import (
+    PresentationView,
+    PresentationBatchView,
+    PresentationDownloadView,
+    PresentationSlideView,
+)
 
 urlpatterns = [
     path(
         "presentations/", PresentationView.as_view(), name="presentation-create"
     ),  # POST
+    path(
+        "presentations/batch/",
+        PresentationBatchView.as_view(),
+        name="presentation-batch",
+    ),  # POST
     path(
         "presentations/<uuid:id>/",
         PresentationView.as_view(),
         name="presentation-detail",
     ),  # GET, PUT
+    path(
+        "presentations/<uuid:id>/slides/<int:index>/",
+        PresentationSlideView.as_view(),
+        name="presentation-slide",
+    ),  # POST (regenerate), PUT (edit)
     path(
         "presentations/<uuid:id>/download",
         PresentationDownloadView.as_view(),
         name="presentation-download",
     ),
+    # Async variants, to be served by an ASGI server
+    path(
+        "async/presentations/",
+        async_views.presentation_list,
+        name="async-presentation-list",
+    ),
+    path(
+        "async/presentations/<uuid:id>/",
+        async_views.presentation_detail,
+        name="async-presentation-detail",
+    ),
+    path(
+        "async/presentations/<uuid:id>/wait",
+        async_views.presentation_wait,
+        name="async-presentation-wait",
+    ),
+    path(
+        "async/presentations/<uuid:id>/events",
+        async_views.presentation_events,
+        name="async-presentation-events",
+    ),
+    path(
+        "async/presentations/<uuid:id>/download",
+        async_views.presentation_download,
+        name="async-presentation-download",
+    ),
 ]
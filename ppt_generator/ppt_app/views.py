@@ -1,110 +1,476 @@
 # ppt_app/views.py
+import copy
 import json
+import time
+import asyncio
+import hashlib
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.http import FileResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.utils.timezone import now
 
-
-from utils.openai_utils import get_gpt_response
-from utils.ppt_utils import generate_pptx_strem
+import config
+from utils.json_stream import JSONArrayStreamParser
+from utils.profiling import profiled
+from utils.metrics import (
+    PRESENTATIONS_PROCESSED,
+    STAGE_DURATION,
+    observe_size,
+    observe_stage,
+    observe_stream,
+)
+from utils.openai_utils import get_gpt_response, stream_tool_call_arguments
+from utils.ppt_utils import (
+    generate_pptx_spooled,
+    generate_pptx_strem,
+    get_layout_placeholder_names,
+    get_placeholder_size_px,
+)
 from utils.pexels_utils import search_pexels_best_match_url
 
-from .models import Presentation, PresentationSlide
-from .serializers import PresentationSerializer
-from .presentation_context import presentation_tools, presentation_context
+from .artifacts import (
+    compute_content_hash,
+    invalidate_artifacts,
+    open_artifact,
+    store_artifact,
+)
+from .job_queue import enqueue_presentation, enqueue_presentations
+from .notifications import publish_presentation_state
+from .single_flight import run_once
+from .models import Presentation, PresentationSlide, StaleGenerationError
+from .pagination import InvalidCursor, keyset_paginate
+from .serializers import (
+    PresentationSerializer,
+    PresentationSlideSerializer,
+    PresentationSummarySerializer,
+)
+from .presentation_context import presentation_tools, presentation_context, slide_tools
 
 logging.getLogger().setLevel("INFO")
 
    
+def is_picture_placeholder(placeholder):
+    return "picture" in placeholder["name"].lower()
+
+
+def get_picture_size(slide, placeholder):
+    """Pixel size of the picture placeholder in the slide layout, or (None, None)."""
+    size = get_placeholder_size_px(slide.get("layout_id"), placeholder["name"])
+    return size or (None, None)
+
+
+def timed_image_search(prompt, size=(None, None)):
+    start = time.perf_counter()
+    image_url = search_pexels_best_match_url(prompt, *size)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logging.info(f"pexels lookup took {elapsed_ms:.0f}ms, prompt: {prompt!r}")
+    return image_url
+
+
 def post_process_slides(slides):
+    # Placeholders still missing an image, in slide/placeholder order
+    pending_pictures = []
     for slide in slides:
         for placeholder in slide["content"]:
             placeholder["id"] = str(uuid.uuid4())
             # Check if 'name' contains 'picture' (case-insensitive) and if image_url exists
-            if "picture" in placeholder["name"].lower():
+            if is_picture_placeholder(placeholder):
                 if "image_url" not in placeholder or not placeholder["image_url"]:
-                    # If image_url does not exist, search for the best match and add it to the content item
-                    placeholder["image_url"] = search_pexels_best_match_url(
-                        placeholder["value"]
+                    pending_pictures.append(
+                        (placeholder, get_picture_size(slide, placeholder))
                     )
+
+    if pending_pictures:
+        # Search the best match of every picture of the deck concurrently,
+        # map() keeps the results in submission order
+        start = time.perf_counter()
+        with observe_stage("image_search"), ThreadPoolExecutor(
+            max_workers=config.PEXELS_MAX_CONCURRENCY
+        ) as executor:
+            image_urls = executor.map(
+                timed_image_search,
+                [x["value"] for x, _ in pending_pictures],
+                [size for _, size in pending_pictures],
+            )
+            for (placeholder, _), image_url in zip(pending_pictures, image_urls):
+                placeholder["image_url"] = image_url
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logging.info(
+            f"pexels lookups done, count: {len(pending_pictures)}, took {elapsed_ms:.0f}ms"
+        )
     return slides
 
 
-def generate_pptx_from_openai(topic, description, num_slides=4):
-    prompt = f"""
+def get_generation_prompt(topic, description, num_slides):
+    return f"""
     Topic: {topic}
     Description: {description}
     Number of slides: {num_slides}
     """
 
+
+def generate_pptx_from_openai(topic, description, num_slides=4):
+    prompt = get_generation_prompt(topic, description, num_slides)
+
     # Call OpenAI API to get content for the presentation
     context = presentation_context
-    response = get_gpt_response(
-        context=[{"role": "assistant", "content": context}],
-        message=prompt,
-        tools=presentation_tools,
-    )
+    with observe_stage("llm_call"):
+        response = get_gpt_response(
+            context=[{"role": "assistant", "content": context}],
+            message=prompt,
+            tools=presentation_tools,
+        )
     if response:
-        args = json.loads(response.tool_calls[0].function.arguments)
+        arguments = response.tool_calls[0].function.arguments
+        observe_size("llm_response", len(arguments))
+        with observe_stage("json_parse"):
+            args = json.loads(arguments)
         slides = post_process_slides(**args)
         return slides
     else:
         return "Error generating PowerPoint content."
 
 
-def process_presentation_obj(presentation_obj):
-    if presentation_obj.status in ['in_progress', 'completed']:
-        return False
-    
-    presentation_obj.status = "in_progress"
-    presentation_obj.save()
-    try:
-        topic = presentation_obj.topic
-        description = presentation_obj.description
-        num_slides = presentation_obj.num_slides
+def get_slide_summary(slide_obj):
+    """Placeholder names and values of a slide, as context of the LLM."""
+    return {
+        "layout_id": slide_obj.layout_id,
+        "layout_name": slide_obj.layout_name,
+        "content": [{"name": x["name"], "value": x["value"]} for x in slide_obj.content],
+    }
+
+
+def get_slide_prompt(presentation, slide_objs, index, layout_id, instructions=None):
+    previous_slide = slide_objs[index - 1] if index > 0 else None
+    next_slide = slide_objs[index + 1] if index + 1 < len(slide_objs) else None
+    prompt = get_generation_prompt(presentation.topic, presentation.description, len(slide_objs))
+    prompt += f"""
+    Regenerate slide {index + 1} only, with the layout ID {layout_id}.
+    Previous slide: {json.dumps(get_slide_summary(previous_slide)) if previous_slide else "none"}
+    Next slide: {json.dumps(get_slide_summary(next_slide)) if next_slide else "none"}
+    """
+    if instructions:
+        prompt += f"Instructions: {instructions}\n"
+    return prompt
+
+
+def is_valid_layout_id(layout_id):
+    layout_ids = [id for _, id in PresentationSlide.LAYOUT_NAMES]
+    return type(layout_id) is int and layout_id in layout_ids
 
-        slides = generate_pptx_from_openai(topic, description, num_slides)
 
+def is_valid_value(name, value):
+    # Pictures hold their search query, the other placeholders a text or lines
+    if isinstance(value, str):
+        return True
+    return (
+        not is_picture_placeholder({"name": name})
+        and isinstance(value, list)
+        and all(isinstance(x, str) for x in value)
+    )
+
+
+def validate_slide(slide):
+    """
+    Checks that a slide fills every placeholder of its layout and no other,
+    and sets its layout name. The content is rebuilt with the name and value of each
+    placeholder only, any other key (image_url included, pictures are always
+    searched on Pexels) is dropped. Raises ValueError otherwise.
+    """
+    if not is_valid_layout_id(slide.get("layout_id")):
+        raise ValueError("Invalid layout_id.")
+    content = slide.get("content")
+    if not isinstance(content, list) or not all(
+        isinstance(x, dict) and isinstance(x.get("name"), str) and "value" in x for x in content
+    ):
+        raise ValueError("content must be a list of {name, value} objects.")
+    for x in content:
+        if not is_valid_value(x["name"], x["value"]):
+            expected = "a string" if is_picture_placeholder(x) else "a string or a list of strings"
+            raise ValueError(f"Invalid value of {x['name']}, expected {expected}.")
+    slide["content"] = [{"name": x["name"], "value": x["value"]} for x in content]
+
+    placeholder_names = get_layout_placeholder_names(slide["layout_id"])
+    names = {x["name"] for x in content}
+    if missing := placeholder_names - names:
+        raise ValueError(f"Missing placeholders: {', '.join(sorted(missing))}.")
+    if unknown := names - placeholder_names:
+        raise ValueError(f"Unknown placeholders: {', '.join(sorted(unknown))}.")
+    layout_names = {id: name for name, id in PresentationSlide.LAYOUT_NAMES}
+    slide["layout_name"] = layout_names[slide["layout_id"]]
+    return slide
+
+
+def generate_slide_from_openai(presentation, slide_objs, index, layout_id, instructions=None):
+    """
+    Generates one slide with the single-slide tool, the LLM only gets the
+    neighbouring slides as context. Raises ValueError on an unusable answer.
+    """
+    prompt = get_slide_prompt(presentation, slide_objs, index, layout_id, instructions)
+    with observe_stage("llm_call"):
+        response = get_gpt_response(
+            context=[{"role": "assistant", "content": presentation_context}],
+            message=prompt,
+            tools=slide_tools,
+        )
+    if not response or not getattr(response, "tool_calls", None):
+        raise ValueError("No slide in the LLM response.")
+    arguments = response.tool_calls[0].function.arguments
+    observe_size("llm_response", len(arguments))
+    slide = json.loads(arguments)
+    if not isinstance(slide, dict) or slide.get("layout_id") != layout_id:
+        raise ValueError(f"The LLM answered with another layout than {layout_id}.")
+    return validate_slide(slide)
+
+
+def update_presentation_slide(presentation, slide_obj, slide):
+    """
+    Saves the new content of a single slide, its images being searched first.
+    Returns False when the slide no longer exists (the deck was regenerated).
+    """
+    post_process_slides([slide])
+    with transaction.atomic():
+        # Moves Last-Modified forward (the ETag follows the content) and
+        # locks out a regeneration started meanwhile
+        if not presentation.update_if_current():
+            return False
+        updated = PresentationSlide.objects.filter(id=slide_obj.id).update(
+            layout_id=slide["layout_id"],
+            layout_name=slide["layout_name"],
+            content=slide["content"],
+        )
+        if not updated:
+            transaction.set_rollback(True)
+            return False
+    slide_obj.layout_id = slide["layout_id"]
+    slide_obj.layout_name = slide["layout_name"]
+    slide_obj.content = slide["content"]
+    invalidate_artifacts(presentation.id)
+    return True
+
+
+def stream_presentation_slides(presentation_obj):
+    """
+    Streaming variant of generate_pptx_from_openai: every slide is saved as
+    soon as the LLM has finished writing it and its image lookups start right
+    away, overlapping with the rest of the generation. Progress is tracked in
+    `presentation_obj.slides_done`. Every write first checks that the
+    generation is still current, StaleGenerationError stops a stale one.
+    """
+    prompt = get_generation_prompt(
+        presentation_obj.topic, presentation_obj.description, presentation_obj.num_slides
+    )
+    # The LLM stage lasts until the last fragment, the slides are saved meanwhile
+    fragments = observe_stream(
+        "llm_call",
+        "llm_response",
+        stream_tool_call_arguments(
+            prompt=prompt,
+            context=[{"role": "assistant", "content": presentation_context}],
+            tools=presentation_tools,
+        ),
+    )
+
+    with transaction.atomic():
+        if not presentation_obj.update_if_current(slides_done=0):
+            raise StaleGenerationError()
         PresentationSlide.objects.filter(presentation=presentation_obj).delete()
 
-        for i, slide in enumerate(slides):
-            slide_obj = PresentationSlide.objects.create(
-                presentation=presentation_obj,
-                layout_id=slide.get("layout_id"),
-                layout_name=slide.get("layout_name"),
-                content=slide.get("content"),
-                index=i,
-            )
+    parser = JSONArrayStreamParser()
+    slide_objs = []
+    lookups = []
+    with ThreadPoolExecutor(max_workers=config.PEXELS_MAX_CONCURRENCY) as executor:
+        for fragment in fragments:
+            for slide in parser.feed(fragment):
+                index = len(slide_objs)
+                for placeholder in slide["content"]:
+                    placeholder["id"] = str(uuid.uuid4())
+                    if is_picture_placeholder(placeholder) and not placeholder.get("image_url"):
+                        placeholder["image_url"] = None
+                        lookups.append(
+                            (
+                                index,
+                                placeholder,
+                                executor.submit(
+                                    timed_image_search,
+                                    placeholder["value"],
+                                    get_picture_size(slide, placeholder),
+                                ),
+                            )
+                        )
+
+                with transaction.atomic():
+                    if not presentation_obj.update_if_current(slides_done=index + 1):
+                        raise StaleGenerationError()
+                    slide_objs.append(
+                        PresentationSlide.objects.create(
+                            presentation=presentation_obj,
+                            layout_id=slide.get("layout_id"),
+                            layout_name=slide.get("layout_name"),
+                            content=slide.get("content"),
+                            index=index,
+                        )
+                    )
+                publish_presentation_state(presentation_obj)
+                if config.LOG_SLIDE_PERSISTENCE:
+                    logging.info(
+                        f"slide content streamed to db, presentatin_id: {presentation_obj.id}, index:{index}"
+                    )
+
+        # The placeholders are shared with the slide rows, fill in the images
+        # and save every slide that got one
+        updated_indexes = set()
+        for index, placeholder, future in lookups:
+            placeholder["image_url"] = future.result()
+            updated_indexes.add(index)
+        with transaction.atomic():
+            if not presentation_obj.update_if_current():
+                raise StaleGenerationError()
+            for index in sorted(updated_indexes):
+                slide_objs[index].save(update_fields=["content"])
+
+    if not slide_objs:
+        raise ValueError("No slide received from the streamed completion")
+    presentation_obj.slides_done = len(slide_objs)
+    return slide_objs
+
+
+def replace_presentation_slides(presentation_obj, slides):
+    """
+    Atomically swaps the slides of the presentation and marks it completed,
+    readers never observe a partially written deck. Raises
+    StaleGenerationError, writing nothing, when the generation is no longer
+    current.
+    """
+    slide_objs = [
+        PresentationSlide(
+            presentation=presentation_obj,
+            layout_id=slide.get("layout_id"),
+            layout_name=slide.get("layout_name"),
+            content=slide.get("content"),
+            index=i,
+        )
+        for i, slide in enumerate(slides)
+    ]
+    with observe_stage("db_write"), transaction.atomic():
+        # Marked completed first, the UPDATE locks the row against a new
+        # claim or content change until the slides are swapped
+        if not presentation_obj.update_if_current(status="completed", slides_done=len(slide_objs)):
+            raise StaleGenerationError()
+        PresentationSlide.objects.filter(presentation=presentation_obj).delete()
+        PresentationSlide.objects.bulk_create(slide_objs)
+    publish_presentation_state(presentation_obj)
+
+    if config.LOG_SLIDE_PERSISTENCE:
+        for i in range(len(slide_objs)):
             logging.info(
                 f"slide content saved to db, presentatin_id: {presentation_obj.id}, index:{i}"
             )
-        presentation_obj.status = "completed"
-        presentation_obj.save()
+    return slide_objs
+
+
+def get_generation_key(topic, description, num_slides):
+    """Identifies generations which give the same deck, to coalesce them."""
+    payload = json.dumps([topic, description, num_slides])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def copy_slides(slides):
+    """Copy of coalesced slides with placeholder ids of their own."""
+    slides = copy.deepcopy(slides)
+    for slide in slides:
+        for placeholder in slide["content"]:
+            placeholder["id"] = str(uuid.uuid4())
+    return slides
+
+
+def generate_presentation_slides(presentation_obj):
+    """
+    Generates the slides of the presentation, streamed or not. Returns the
+    slides and whether they were already saved (streamed) to the presentation.
+    """
+    if config.OPENAI_STREAMING:
+        slide_objs = stream_presentation_slides(presentation_obj)
+        slides = [
+            {"layout_id": s.layout_id, "layout_name": s.layout_name, "content": s.content}
+            for s in slide_objs
+        ]
+        return slides, True
+
+    slides = generate_pptx_from_openai(
+        presentation_obj.topic, presentation_obj.description, presentation_obj.num_slides
+    )
+    if not isinstance(slides, list):
+        raise ValueError(slides)
+    return slides, False
+
+
+@profiled("job", get_id=lambda presentation_obj: presentation_obj.id)
+def process_presentation_obj(presentation_obj):
+    # Only one of concurrent jobs (duplicate enqueues, retries) of a
+    # presentation owns its new generation
+    if not presentation_obj.claim():
+        logging.info(f"presentation already claimed or completed, presentation_id: {presentation_obj.id}")
+        return False
+
+    publish_presentation_state(presentation_obj)
+    start = time.perf_counter()
+    try:
+        streamed = False
+        if config.GENERATION_COALESCING:
+            # Identical requests submitted together share one LLM + image
+            # pipeline, the followers are filled from the leader's slides
+            def generate():
+                nonlocal streamed
+                slides, streamed = generate_presentation_slides(presentation_obj)
+                return slides
+
+            key = get_generation_key(
+                presentation_obj.topic, presentation_obj.description, presentation_obj.num_slides
+            )
+            # A stale leader must not fail the other presentations, one of
+            # them takes over instead
+            slides, leader = run_once(key, generate, abandon_on=StaleGenerationError)
+            if not leader:
+                logging.info(f"generation coalesced, presentation_id: {presentation_obj.id}")
+                slides = copy_slides(slides)
+        else:
+            slides, streamed = generate_presentation_slides(presentation_obj)
+
+        if streamed:
+            if not presentation_obj.set_status("completed"):
+                raise StaleGenerationError()
+            publish_presentation_state(presentation_obj)
+        else:
+            replace_presentation_slides(presentation_obj, slides)
+        invalidate_artifacts(presentation_obj.id)
+        PRESENTATIONS_PROCESSED.labels("completed").inc()
         return True
+    except StaleGenerationError:
+        # A newer generation owns the presentation, its results are kept
+        logging.info(f"stale generation discarded, presentation_id: {presentation_obj.id}")
+        PRESENTATIONS_PROCESSED.labels("discarded").inc()
+        return False
     except Exception as e:
         # Log the exception and update the status to 'failed'
         logging.error(f"Error processing PPT for presentation_id: {presentation_obj.id}, Error: {e}")
-        presentation_obj.status = "failed"
-        presentation_obj.save()
+        if presentation_obj.set_status("failed"):
+            publish_presentation_state(presentation_obj)
+        PRESENTATIONS_PROCESSED.labels("failed").inc()
         return False
+    finally:
+        STAGE_DURATION.labels("generation").observe(time.perf_counter() - start)
 
 
-class PPTCreateResponseThen(Response):
-    def __init__(self, data, then_callback, obj, **kwargs):
-        super().__init__(data, **kwargs)
-        self.obj = obj
-        self.then_callback = then_callback
-
-    def close(self):
-        super().close()
-        self.then_callback(self.obj)
-        
 class PresentationView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -116,9 +482,19 @@ class PresentationView(APIView):
                 return Response({"detail": "Not found."}, 404)
             return Response(PresentationSerializer(presentation).data, 200)
         
-        presentations = Presentation.objects.filter(user=request.user).order_by('-create_time')
-        serializer = PresentationSerializer(presentations, many=True)
-        return Response(serializer.data, 200)
+        presentations = Presentation.objects.filter(user=request.user).only(
+            *PresentationSummarySerializer.Meta.fields
+        )
+        try:
+            page, next_cursor = keyset_paginate(
+                presentations,
+                cursor=request.query_params.get("cursor"),
+                page_size=request.query_params.get("page_size"),
+            )
+        except InvalidCursor:
+            return Response({"detail": "Invalid cursor."}, 400)
+        serializer = PresentationSummarySerializer(page, many=True)
+        return Response({"results": serializer.data, "next_cursor": next_cursor}, 200)
 
     def post(self, request):
         # Ensure the request context is passed to the serializer
@@ -128,11 +504,9 @@ class PresentationView(APIView):
 
         if serializer.is_valid():
             presentation = serializer.save()
-            return PPTCreateResponseThen(
-                    serializer.data,
-                    process_presentation_obj,
-                    presentation
-                )
+            # Generation runs in the worker pool (run_presentation_workers)
+            enqueue_presentation(presentation.id)
+            return Response(serializer.data, 200)
 
         return Response(serializer.errors, 400)
 
@@ -176,18 +550,143 @@ class PresentationView(APIView):
         )  # Allow partial updates
         if serializer.is_valid():
             presentation = serializer.save()
+            if 'theme' in filtered_data:
+                invalidate_artifacts(presentation.id)
             if update_content:
-                presentation.status = 'pending'
-                presentation.save()
-                return PPTCreateResponseThen(
-                    serializer.data,
-                    process_presentation_obj,
-                    presentation
-                )
+                presentation.restart_generation()
+                publish_presentation_state(presentation)
+                enqueue_presentation(presentation.id)
             return Response(PresentationSerializer(presentation).data, 200)
         return Response(serializer.errors, 400)
 
 
+class PresentationSlideView(APIView):
+    """Regenerates (POST) or edits (PUT) a single slide of a completed presentation."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get_slide(self, request, id, index):
+        try:
+            presentation = Presentation.objects.get(id=id, user=request.user)
+        except Presentation.DoesNotExist:
+            return None, None, Response({"detail": "Not found."}, 404)
+        if presentation.status != "completed":
+            return None, None, Response(
+                {"detail": "Slides can only be changed once the presentation is completed."}, 409
+            )
+        slide_objs = list(PresentationSlide.objects.filter(presentation=presentation).order_by("index"))
+        if not 0 <= index < len(slide_objs):
+            return None, None, Response({"detail": "Slide not found."}, 404)
+        return presentation, slide_objs, None
+
+    def save_slide(self, presentation, slide_obj, slide):
+        if not update_presentation_slide(presentation, slide_obj, slide):
+            return Response({"detail": "The presentation is being regenerated."}, 409)
+        return Response(PresentationSlideSerializer(slide_obj).data, 200)
+
+    def post(self, request, id, index):
+        presentation, slide_objs, error = self.get_slide(request, id, index)
+        if error:
+            return error
+        slide_obj = slide_objs[index]
+
+        layout_id = request.data.get("layout_id", slide_obj.layout_id)
+        if not is_valid_layout_id(layout_id):
+            return Response({"detail": "Invalid layout_id."}, 400)
+        try:
+            slide = generate_slide_from_openai(
+                presentation, slide_objs, index, layout_id, request.data.get("instructions")
+            )
+        except Exception as e:
+            logging.error(f"Error regenerating slide, presentation_id: {presentation.id}, index: {index}, Error: {e}")
+            return Response({"detail": "The slide could not be generated."}, 502)
+        return self.save_slide(presentation, slide_obj, slide)
+
+    def put(self, request, id, index):
+        presentation, slide_objs, error = self.get_slide(request, id, index)
+        if error:
+            return error
+        slide_obj = slide_objs[index]
+
+        slide = {
+            "layout_id": request.data.get("layout_id", slide_obj.layout_id),
+            "content": request.data.get("content"),
+        }
+        try:
+            validate_slide(slide)
+        except ValueError as e:
+            return Response({"detail": str(e)}, 400)
+        return self.save_slide(presentation, slide_obj, slide)
+
+
+class PresentationBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Creates a list of presentations at once, generated by the worker pool
+        after the interactive requests.
+        """
+        if not isinstance(request.data, list) or not request.data:
+            return Response({"detail": "Expected a non-empty list of presentations."}, 400)
+
+        serializer = PresentationSerializer(
+            data=request.data,
+            many=True,
+            max_length=config.BATCH_MAX_SIZE,
+            context={"request": request},
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, 400)
+
+        try:
+            presentations = serializer.save()
+        except ValueError as e:
+            return Response({"detail": str(e)}, 400)
+        enqueue_presentations([presentation.id for presentation in presentations])
+        return Response(serializer.data, 200)
+
+
+PPTX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+def set_pptx_headers(response, presentation, etag, last_modified):
+    title = presentation.topic[:50]
+    current_datetime = now().strftime("%Y/%m/%d_%H-%M-%S")
+    filename = f"{title}_{current_datetime}.pptx"
+
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+async def aiter_file(f, chunk_size):
+    """Reads the file chunk by chunk in a thread, without blocking the event loop."""
+    try:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+class PPTXFileResponse(FileResponse):
+    """
+    FileResponse streamed chunk by chunk under ASGI as well, where Django
+    reads the sync iterator of a FileResponse into a list before sending it.
+    """
+
+    def __aiter__(self):
+        return aiter_file(self.file_to_stream, self.block_size)
+
+
+def get_pptx_response(presentation, pptx_stream, etag, last_modified):
+    # Return the PPTX file as a response
+    response = PPTXFileResponse(pptx_stream, content_type=PPTX_CONTENT_TYPE)
+    response.block_size = config.PPTX_STREAM_CHUNK_SIZE
+    return set_pptx_headers(response, presentation, etag, last_modified)
+
+
 class PresentationDownloadView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -206,19 +705,30 @@ class PresentationDownloadView(APIView):
                 {"layout_id": slide.layout_id, "content": slide.content}
                 for slide in slides
             ]
-            pptx_stream = generate_pptx_strem(slides=slide_data, theme=theme)
-
-            # Return the PPTX file as a response
-            title = presentation.topic[:50]
-            current_datetime = now().strftime("%Y/%m/%d_%H-%M-%S")
-            filename = f"{title}_{current_datetime}.pptx"
 
-            response = FileResponse(
-                pptx_stream,
-                content_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            )
-            response["Content-Disposition"] = f'attachment; filename="{filename}"'
-            return response
+            # The content hash identifies the rendered file, clients holding
+            # it get a 304
+            content_hash = compute_content_hash(slide_data, theme)
+            etag = f'"{content_hash}"'
+            last_modified = int(presentation.update_time.timestamp())
+            if not_modified := get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            ):
+                return not_modified
+
+            # Serve the cached render while slides and theme are unchanged
+            pptx_stream = open_artifact(presentation.id, content_hash)
+            if pptx_stream is None:
+                if config.PPTX_STREAMING_DOWNLOAD:
+                    pptx_stream, complete = generate_pptx_spooled(slides=slide_data, theme=theme)
+                else:
+                    pptx_stream, complete = generate_pptx_strem(slides=slide_data, theme=theme)
+                # A render missing pictures (failed downloads) is not cached,
+                # the next download retries them
+                if complete:
+                    store_artifact(presentation.id, content_hash, pptx_stream)
+
+            return get_pptx_response(presentation, pptx_stream, etag, last_modified)
 
         except Presentation.DoesNotExist:
             return Response({"detail": "Presentation not found"}, 404)
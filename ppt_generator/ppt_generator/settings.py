@@ -73,11 +73,13 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
-        "user": "5/minute",  # Limit to 5 requests per minute
+        "user": os.getenv("USER_THROTTLE_RATE", "5/minute"),  # Limit to 5 requests per minute
     },
 }
 
 MIDDLEWARE = [
+    "ppt_app.metrics.MetricsMiddleware",
+    "ppt_app.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
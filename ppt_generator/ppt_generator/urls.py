@@ -19,9 +19,11 @@ from django.contrib import admin
 from django.urls import path
 from django.urls import path, include
 
+from ppt_app.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("accounts.urls")),  # Include the accounts URLs
     path("api/v1/", include("ppt_app.urls")),  # Include the accounts URLs
+    path("internal/metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,107 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+class LRUBytesCache:
+    """
+    Thread-safe LRU cache of byte strings bounded by their total size.
+
+    Entries evicted from memory are spilled to `spill_dir` (when set), which is
+    itself bounded by `max_disk_bytes`, oldest files being removed first.
+    """
+
+    def __init__(self, max_bytes, spill_dir=None, max_disk_bytes=0):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def _spill_path(self, key):
+        return os.path.join(
+            self.spill_dir, hashlib.sha256(key.encode()).hexdigest()
+        )
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.spill_dir:
+            path = self._spill_path(key)
+            try:
+                with open(path, "rb") as f:
+                    value = f.read()
+            except FileNotFoundError:
+                return None
+            os.utime(path)  # Keep recently read files away from pruning
+            self.set(key, value, spill=False)
+            return value
+        return None
+
+    def set(self, key, value, spill=True):
+        if len(value) > self.max_bytes:
+            if spill:
+                self._spill(key, value)
+            return
+
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                old_key, old_value = self._entries.popitem(last=False)
+                self._size -= len(old_value)
+                evicted.append((old_key, old_value))
+
+        for old_key, old_value in evicted:
+            self._spill(old_key, old_value)
+
+    def _spill(self, key, value):
+        if not self.spill_dir:
+            return
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Error spilling cache entry to disk: {e}")
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        if not self.max_disk_bytes:
+            return
+        files = []
+        total = 0
+        for entry in os.scandir(self.spill_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
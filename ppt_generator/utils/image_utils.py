@@ -0,0 +1,37 @@
+import io
+import logging
+
+from PIL import Image, UnidentifiedImageError
+
+import config
+
+
+def downscale_image(content, max_dimension=None, quality=None):
+    """
+    Resizes the image so its largest side fits `max_dimension` pixels and
+    recompresses it (JPEG, or optimized PNG when it has transparency). The
+    original bytes are returned when they are already smaller.
+    """
+    max_dimension = max_dimension or config.IMAGE_MAX_DIMENSION
+    quality = quality or config.IMAGE_JPEG_QUALITY
+    try:
+        image = Image.open(io.BytesIO(content))
+        image.load()
+    except (UnidentifiedImageError, OSError) as e:
+        logging.warning(f"Error decoding image, keeping it as is: {e}")
+        return content
+
+    if max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    output = io.BytesIO()
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image.save(output, format="PNG", optimize=True)
+    else:
+        image.convert("RGB").save(
+            output, format="JPEG", quality=quality, optimize=True, progressive=True
+        )
+
+    if output.tell() >= len(content):
+        return content
+    return output.getvalue()
@@ -0,0 +1,50 @@
+import json
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally parses a JSON document of the form `{"key": [{...}, {...}]}`
+    received in fragments, e.g. streamed tool-call arguments. `feed` returns
+    the array items completed by the fragment, as soon as their closing brace
+    arrives.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.item_start = None
+
+    def feed(self, fragment):
+        self.buffer += fragment
+        items = []
+        for i in range(self.pos, len(self.buffer)):
+            char = self.buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                # Depth 2 is inside the array held by the top-level object
+                if char == "{" and self.depth == 2:
+                    self.item_start = i
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if char == "}" and self.depth == 2 and self.item_start is not None:
+                    items.append(json.loads(self.buffer[self.item_start : i + 1]))
+                    self.item_start = None
+        self.pos = len(self.buffer)
+
+        # Parsed items are not needed anymore, keep the buffer small
+        if self.item_start is None:
+            self.buffer = ""
+            self.pos = 0
+        return items
@@ -0,0 +1,91 @@
+import json
+import time
+import hashlib
+import logging
+
+from django_redis import get_redis_connection
+from openai.types.chat import ChatCompletion
+from redis.exceptions import RedisError
+
+import config
+from utils.metrics import count_cache_lookup
+
+KEY_PREFIX = "llm:completion:"
+# Cached keys scored by last use, to evict the least recently used ones
+INDEX_KEY = "llm:completion-index"
+HITS_KEY = "llm:completion-hits"
+MISSES_KEY = "llm:completion-misses"
+
+
+def get_cache_key(model, messages, tools, temperature):
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "tools": tools,
+            "temperature": temperature,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached_completion(cache_key):
+    """Returns the cached ChatCompletion or None, counting hits and misses."""
+    try:
+        conn = get_redis_connection("default")
+        data = conn.get(KEY_PREFIX + cache_key)
+        count_cache_lookup("llm", data is not None)
+        if data is None:
+            conn.incr(MISSES_KEY)
+            return None
+        pipe = conn.pipeline()
+        pipe.incr(HITS_KEY)
+        pipe.zadd(INDEX_KEY, {cache_key: time.time()})
+        pipe.execute()
+        return ChatCompletion.model_validate_json(data)
+    except (RedisError, ValueError) as e:
+        logging.warning(f"Error reading the completion cache: {e}")
+        return None
+
+
+def is_cacheable(response):
+    """
+    Only completions calling a tool with valid JSON arguments are cached, a
+    refusal or plain text answer is asked again next time.
+    """
+    try:
+        json.loads(response.choices[0].message.tool_calls[0].function.arguments)
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return False
+    return True
+
+
+def store_completion(cache_key, response):
+    try:
+        conn = get_redis_connection("default")
+        now = time.time()
+        pipe = conn.pipeline()
+        pipe.set(KEY_PREFIX + cache_key, response.model_dump_json(), ex=config.LLM_CACHE_TTL)
+        pipe.zadd(INDEX_KEY, {cache_key: now})
+        # Entries past their TTL are already gone from Redis
+        pipe.zremrangebyscore(INDEX_KEY, 0, now - config.LLM_CACHE_TTL)
+        pipe.zcard(INDEX_KEY)
+        size = pipe.execute()[-1]
+
+        if size > config.LLM_CACHE_MAX_ENTRIES:
+            evicted = conn.zpopmin(INDEX_KEY, size - config.LLM_CACHE_MAX_ENTRIES)
+            if evicted:
+                conn.delete(*[KEY_PREFIX + key.decode() for key, _ in evicted])
+    except RedisError as e:
+        logging.warning(f"Error writing the completion cache: {e}")
+
+
+def get_cache_stats():
+    conn = get_redis_connection("default")
+    hits, misses = conn.mget(HITS_KEY, MISSES_KEY)
+    return {
+        "hits": int(hits or 0),
+        "misses": int(misses or 0),
+        "entries": conn.zcard(INDEX_KEY),
+    }
@@ -0,0 +1,95 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Payload sizes, from a 1KB completion to a 64MB deck
+SIZE_BUCKETS = [2**x for x in range(10, 27, 2)]
+
+STAGE_DURATION = Histogram(
+    "ppt_stage_duration_seconds",
+    "Duration of the generation and rendering stages.",
+    ["stage"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300],
+)
+PAYLOAD_SIZE = Histogram(
+    "ppt_payload_size_bytes",
+    "Size of the LLM responses, downloaded images and rendered decks.",
+    ["kind"],
+    buckets=SIZE_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "ppt_cache_requests_total",
+    "Lookups of the caches, by outcome (hit or miss).",
+    ["cache", "result"],
+)
+PRESENTATIONS_PROCESSED = Counter(
+    "ppt_presentations_processed_total",
+    "Presentation generations, by outcome.",
+    ["status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "ppt_http_request_duration_seconds",
+    "Duration of the API requests.",
+    ["view", "method", "status"],
+)
+
+
+@contextmanager
+def observe_stage(stage):
+    """Records the duration of the block in ppt_stage_duration_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage).observe(time.perf_counter() - start)
+
+
+def observe_size(kind, size):
+    PAYLOAD_SIZE.labels(kind).observe(size)
+
+
+def observe_stream(stage, kind, fragments):
+    """
+    Yields the fragments of a stream, then records its duration, from the
+    first request to the last fragment, under `stage` and its total size
+    under `kind`.
+    """
+    start = time.perf_counter()
+    size = 0
+    try:
+        for fragment in fragments:
+            size += len(fragment)
+            yield fragment
+    finally:
+        STAGE_DURATION.labels(stage).observe(time.perf_counter() - start)
+        observe_size(kind, size)
+
+
+def count_cache_lookup(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render_metrics(*collectors):
+    """
+    Returns the metrics in the Prometheus text format and its content type,
+    aggregated over every process when PROMETHEUS_MULTIPROC_DIR is set
+    (gunicorn workers, worker pools). `collectors` are added to the export.
+    """
+    registry = CollectorRegistry()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    for collector in collectors:
+        registry.register(collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,22 +1,83 @@
+import os
 import logging
+import threading
+
+import httpx
 from openai import OpenAI
 import json
 
 import config
+from utils import llm_cache
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """
+    Returns the process-wide OpenAI client. Its HTTP connection pool is shared
+    by every thread of the process, requests are bounded by OPENAI_TIMEOUT.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http_client = httpx.Client(
+                    timeout=httpx.Timeout(
+                        config.OPENAI_TIMEOUT, connect=config.OPENAI_CONNECT_TIMEOUT
+                    ),
+                    limits=httpx.Limits(
+                        max_connections=config.OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=config.OPENAI_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                _client = OpenAI(
+                    api_key=config.OPENAI_API_KEY,
+                    base_url=config.OPENAI_BASE_URL,
+                    max_retries=config.OPENAI_MAX_RETRIES,
+                    http_client=http_client,
+                )
+    return _client
+
+
+def reset_openai_clients():
+    """Drops the clients, the next calls build them from the current config."""
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
 
+# Sockets and locks inherited from the parent must not be shared with a forked
+# child (pre-forking servers), it builds its own client on demand
+os.register_at_fork(after_in_child=reset_openai_clients)
 
-def get_completion(prompt=None, context=[], model="gpt-4", tools=None):
+
+def get_completion(prompt=None, context=[], model="gpt-4", tools=None, use_cache=None):
+    """
+    Returns the completion of the messages. With `use_cache` (defaults to
+    LLM_CACHE_ENABLED) identical requests are answered from the Redis cache,
+    they are deterministic with temperature 0.
+    """
+    use_cache = config.LLM_CACHE_ENABLED if use_cache is None else use_cache
     try:
         # Prepare the message history
         messages = context[:]
         if prompt:
             messages.append({"role": "user", "content": prompt})
 
+        if use_cache:
+            cache_key = llm_cache.get_cache_key(model, messages, tools, 0)
+            if (response := llm_cache.get_cached_completion(cache_key)) is not None:
+                return response
+
         # Make the OpenAI API call to get the completion response
-        client = OpenAI(api_key=config.OPENAI_API_KEY)
+        client = get_openai_client()
         response = client.chat.completions.create(
             model=model, messages=messages, temperature=0, tools=tools
         )
+        if use_cache and llm_cache.is_cacheable(response):
+            llm_cache.store_completion(cache_key, response)
         return response
     except Exception as e:
         logging.error(f"Error in getting completion: {e}")
@@ -33,3 +94,24 @@ def get_gpt_response(context, message, tools=[], thread=[]):
         return response.choices[0].message
     except:
         return response
+
+
+def stream_tool_call_arguments(prompt=None, context=[], model="gpt-4", tools=None):
+    """
+    Streams a completion and yields the argument fragments of its first tool
+    call as they arrive. Errors are raised to the caller.
+    """
+    messages = context[:]
+    if prompt:
+        messages.append({"role": "user", "content": prompt})
+
+    stream = get_openai_client().chat.completions.create(
+        model=model, messages=messages, temperature=0, tools=tools, stream=True
+    )
+    with stream:
+        for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.tool_calls:
+                continue
+            for tool_call in chunk.choices[0].delta.tool_calls:
+                if tool_call.index == 0 and tool_call.function and tool_call.function.arguments:
+                    yield tool_call.function.arguments
@@ -1,32 +1,155 @@
 import io
+import asyncio
+import hashlib
+import logging
+import weakref
 import requests
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from django.core.cache import cache
+
 import config
+from utils.image_cache import LRUBytesCache
+from utils.image_utils import downscale_image
+from utils.metrics import count_cache_lookup, observe_size, observe_stage
+
+# Downloaded images shared by every render of this process, keyed by URL
+image_cache = LRUBytesCache(
+    max_bytes=config.IMAGE_CACHE_MAX_BYTES,
+    spill_dir=config.IMAGE_CACHE_DIR,
+    max_disk_bytes=config.IMAGE_CACHE_MAX_DISK_BYTES,
+)
+
+# One async HTTP client (and connection pool) per event loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=config.HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=config.HTTP_MAX_CONNECTIONS),
+            follow_redirects=True,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def normalize_query(description):
+    return " ".join(description.lower().split())
+
+
+def get_search_cache_key(query):
+    return f"pexels:search:{hashlib.sha1(query.encode()).hexdigest()}"
 
 
-def search_pexels_best_match_url(description):
-    url = "https://api.pexels.com/v1/search"
+def search_pexels_best_match(description):
+    """
+    Returns the metadata (id, size, alt, src variants) of the best matching
+    Pexels photo, or None when there is no match or the search failed. Both
+    outcomes are cached, failures and misses with a shorter TTL.
+    """
+    query = normalize_query(description)
+    cache_key = get_search_cache_key(query)
+    cached = cache.get(cache_key)
+    count_cache_lookup("pexels_search", cached is not None)
+    if cached is not None:
+        return cached["photo"]
+
+    url = f"{config.PEXELS_API_URL}/search"
     headers = {"Authorization": config.PEXEL_API_KEY}
-    params = {"query": description, "per_page": 1}
+    params = {"query": query, "per_page": 1}
 
     try:
-        response = requests.get(url, headers=headers, params=params)
+        with observe_stage("pexels_search"):
+            response = requests.get(
+                url, headers=headers, params=params, timeout=config.HTTP_TIMEOUT
+            )
         response.raise_for_status()
         data = response.json()
-
-        if data.get("photos"):
-            return data["photos"][0]["src"]["original"]
-        else:
-            return f"No images found for description: {description}"
     except requests.exceptions.RequestException as e:
-        return f"An error occurred: {e}"
+        logging.warning(f"Error searching pexels, query: {query!r}, Error: {e}")
+        cache.set(cache_key, {"photo": None}, config.PEXELS_ERROR_CACHE_TTL)
+        return None
 
+    if not data.get("photos"):
+        cache.set(cache_key, {"photo": None}, config.PEXELS_MISS_CACHE_TTL)
+        return None
 
-def get_image_stream_from_url(image_url):
+    photo = data["photos"][0]
+    photo = {key: photo.get(key) for key in ("id", "width", "height", "alt", "src")}
+    cache.set(cache_key, {"photo": photo}, config.PEXELS_SEARCH_CACHE_TTL)
+    return photo
+
+
+def get_pexels_src_sizes(photo):
+    """
+    Approximate pixel size of the uncropped src variants of a Pexels photo,
+    from the smallest to the original.
+    """
+    width, height = photo["width"], photo["height"]
+
+    def fit(max_width, max_height):
+        scale = min(max_width / width, max_height / height, 1)
+        return round(width * scale), round(height * scale)
+
+    def scale_to_height(target_height):
+        scale = min(target_height / height, 1)
+        return round(width * scale), round(height * scale)
+
+    return [
+        ("small", *scale_to_height(130)),
+        ("medium", *scale_to_height(350)),
+        ("large", *fit(940, 650)),
+        ("large2x", *fit(1880, 1300)),
+        ("original", width, height),
+    ]
+
+
+def pick_pexels_src(photo, width=None, height=None):
+    """
+    Returns the URL of the smallest variant of the photo covering a
+    `width` x `height` pixels area (pictures are cropped to fill their
+    placeholder), the original when no size is given.
+    """
+    src = photo["src"]
+    if not width or not height or not photo.get("width") or not photo.get("height"):
+        return src["original"]
+    for name, variant_width, variant_height in get_pexels_src_sizes(photo):
+        if name in src and variant_width >= width and variant_height >= height:
+            return src[name]
+    return src["original"]
+
+
+def search_pexels_best_match_url(description, width=None, height=None):
+    """
+    Returns the URL of the best matching photo, sized for a `width` x
+    `height` pixels placeholder when given, or None.
+    """
+    photo = search_pexels_best_match(description)
+    if photo is None:
+        return None
+    return pick_pexels_src(photo, width, height)
+
+
+def fetch_image_bytes(image_url):
+    content = image_cache.get(image_url)
+    count_cache_lookup("image", content is not None)
+    if content is not None:
+        return content
     try:
-        response = requests.get(image_url)
+        with observe_stage("image_download"):
+            response = requests.get(image_url, timeout=config.HTTP_TIMEOUT)
         response.raise_for_status()
-        image_stream = io.BytesIO(response.content)
-        return image_stream
+        observe_size("image", len(response.content))
+        # Only the downscaled image is kept and embedded in the decks
+        content = downscale_image(response.content)
+        image_cache.set(image_url, content)
+        return content
     except requests.exceptions.RequestException as e:
         print(f"Error fetching image from URL: {e}")
         return None
@@ -35,6 +158,54 @@ def get_image_stream_from_url(image_url):
         return None
 
 
+async def async_fetch_image_bytes(image_url):
+    content = image_cache.get(image_url)
+    count_cache_lookup("image", content is not None)
+    if content is not None:
+        return content
+    try:
+        with observe_stage("image_download"):
+            response = await get_async_http_client().get(image_url)
+        response.raise_for_status()
+        observe_size("image", len(response.content))
+        # Decoding and resizing is CPU bound, keep it off the event loop
+        content = await asyncio.to_thread(downscale_image, response.content)
+        image_cache.set(image_url, content)
+        return content
+    except httpx.HTTPError as e:
+        logging.warning(f"Error fetching image from URL: {e}")
+        return None
+
+
+def get_image_stream_from_url(image_url):
+    content = fetch_image_bytes(image_url)
+    if content is None:
+        return None
+    return io.BytesIO(content)
+
+
+def prefetch_images(image_urls):
+    """Downloads the given URLs in parallel, returns a {url: bytes} mapping."""
+    image_urls = list(dict.fromkeys(image_urls))
+    if not image_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=config.IMAGE_FETCH_MAX_CONCURRENCY) as executor:
+        return dict(zip(image_urls, executor.map(fetch_image_bytes, image_urls)))
+
+
+async def async_prefetch_images(image_urls):
+    """Async version of prefetch_images, returns a {url: bytes} mapping."""
+    image_urls = list(dict.fromkeys(image_urls))
+    semaphore = asyncio.Semaphore(config.IMAGE_FETCH_MAX_CONCURRENCY)
+
+    async def fetch(image_url):
+        async with semaphore:
+            return await async_fetch_image_bytes(image_url)
+
+    contents = await asyncio.gather(*[fetch(image_url) for image_url in image_urls])
+    return dict(zip(image_urls, contents))
+
+
 def get_image_from_promt(prompt):
     image_url = search_pexels_best_match_url(prompt)
     if image_url:
@@ -1,50 +1,131 @@
 import io
+import json
+import tempfile
+from functools import lru_cache
+
 from pptx import Presentation
-from pptx.util import Pt
+from pptx.util import Pt, Inches
 from pptx.dml.color import RGBColor
+from pptx.text.text import Font
 
+import config
+from utils.metrics import observe_size, observe_stage
+from utils.pexels_utils import prefetch_images
+from utils.slide_cache import (
+    cache_slide,
+    get_cached_slide,
+    get_picture_url,
+    has_missing_images,
+    is_slide_cached,
+    load_slide,
+)
 
-from utils.pexels_utils import get_image_stream_from_url
 
+EMU_PER_INCH = Inches(1)
 
-def apply_theme(ppt, theme_config):
-    """Applies the theme configuration to all slides in the PowerPoint presentation."""
 
-    for slide in ppt.slides:
-        # Apply background color
-        slide.background.fill.solid()
-        slide.background.fill.fore_color.rgb = RGBColor(
-            *theme_config["colors"]["background_color"]
-        )
+def set_font(font, name, size, color):
+    font.name = name
+    font.size = Pt(size)
+    font.color.rgb = RGBColor(*color)
 
-        # Apply title font, font size, and color
-        title_shape = slide.shapes.title
-        if title_shape:
-            title_shape.text_frame.paragraphs[0].font.name = theme_config["fonts"][
-                "title_font"
-            ]
-            title_shape.text_frame.paragraphs[0].font.size = Pt(
-                theme_config["font_sizes"]["title_size"]
+
+def apply_theme(ppt, theme_config):
+    """
+    Applies the theme configuration to the slide master and layouts, every
+    slide added afterwards inherits the background and text styles.
+    """
+    fonts = theme_config["fonts"]
+    font_sizes = theme_config["font_sizes"]
+    colors = theme_config["colors"]
+    title_style = (fonts["title_font"], font_sizes["title_size"], colors["title_color"])
+    content_style = (
+        fonts["content_font"],
+        font_sizes["content_size"],
+        colors["content_color"],
+    )
+
+    master = ppt.slide_master
+    master.background.fill.solid()
+    master.background.fill.fore_color.rgb = RGBColor(*colors["background_color"])
+
+    # Default text styles of the master
+    for def_rpr in master.element.xpath("./p:txStyles/p:titleStyle//a:defRPr"):
+        set_font(Font(def_rpr), *title_style)
+    for def_rpr in master.element.xpath("./p:txStyles/p:bodyStyle//a:defRPr"):
+        set_font(Font(def_rpr), *content_style)
+
+    # Placeholders of the master and layouts override some of those styles,
+    # the title is always the placeholder with idx 0
+    for layout in [master, *ppt.slide_layouts]:
+        for placeholder in layout.placeholders:
+            style = (
+                title_style if placeholder.placeholder_format.idx == 0 else content_style
             )
-            title_shape.text_frame.paragraphs[0].font.color.rgb = RGBColor(
-                *theme_config["colors"]["title_color"]
+            for def_rpr in placeholder.element.xpath("./p:txBody/a:lstStyle//a:defRPr"):
+                set_font(Font(def_rpr), *style)
+
+
+@lru_cache(maxsize=config.THEME_TEMPLATE_CACHE_SIZE)
+def get_themed_template(theme_json):
+    """Returns the bytes of a blank presentation with the theme applied."""
+    ppt = Presentation()
+    apply_theme(ppt, json.loads(theme_json))
+    template_stream = io.BytesIO()
+    ppt.save(template_stream)
+    return template_stream.getvalue()
+
+
+def new_presentation(theme):
+    if not theme:
+        return Presentation()
+    theme_json = json.dumps(theme, sort_keys=True)
+    return Presentation(io.BytesIO(get_themed_template(theme_json)))
+
+
+@lru_cache(maxsize=None)
+def get_placeholder_size_px(layout_id, placeholder_name):
+    """
+    Size in pixels (at IMAGE_TARGET_DPI) of a placeholder of the default
+    layouts, or None when the layout has no such placeholder.
+    """
+    try:
+        layout = Presentation().slide_layouts[layout_id]
+    except (IndexError, TypeError):
+        return None
+    for placeholder in layout.placeholders:
+        if placeholder.name == placeholder_name:
+            return (
+                round(placeholder.width / EMU_PER_INCH * config.IMAGE_TARGET_DPI),
+                round(placeholder.height / EMU_PER_INCH * config.IMAGE_TARGET_DPI),
             )
+    return None
 
-        # Apply content font, font size, and color to all content placeholders
-        for shape in slide.shapes:
-            if shape.has_text_frame:
-                # Skip title shape, it's already handled
-                if shape == slide.shapes.title:
-                    continue
-                for paragraph in shape.text_frame.paragraphs:
-                    paragraph.font.name = theme_config["fonts"]["content_font"]
-                    paragraph.font.size = Pt(theme_config["font_sizes"]["content_size"])
-                    paragraph.font.color.rgb = RGBColor(
-                        *theme_config["colors"]["content_color"]
-                    )
-
-
-def create_slide(ppt, slide_data):
+
+@lru_cache(maxsize=None)
+def get_layout_placeholder_names(layout_id):
+    """
+    Names of the placeholders of a slide of the default layout, i.e. the
+    content create_slide needs, or None for an unknown layout.
+    """
+    ppt = Presentation()
+    try:
+        slide = ppt.slides.add_slide(ppt.slide_layouts[layout_id])
+    except (IndexError, TypeError):
+        return None
+    return frozenset(placeholder.name for placeholder in slide.placeholders)
+
+
+def get_image_urls(slides):
+    return [
+        url
+        for slide_data in slides
+        for x in slide_data["content"]
+        if (url := get_picture_url(x))
+    ]
+
+
+def create_slide(ppt, slide_data, images, list_font_size=None):
     slide_layout = ppt.slide_layouts[slide_data["layout_id"]]
     slide = ppt.slides.add_slide(slide_layout)
 
@@ -56,8 +137,9 @@ def create_slide(ppt, slide_data):
         if value := matched_content["value"]:
             if "picture" in placeholder_name.lower() and isinstance(value, str):
                 try:
-                    if image_url := matched_content["image_url"]:
-                        placeholder.insert_picture(get_image_stream_from_url(image_url))
+                    image = images.get(matched_content.get("image_url"))
+                    if image is not None:
+                        placeholder.insert_picture(io.BytesIO(image))
                 except Exception as e:
                     print(f"Error inserting picture: {e}")
 
@@ -65,24 +147,91 @@ def create_slide(ppt, slide_data):
                 for line in value:
                     p = placeholder.text_frame.add_paragraph()
                     p.text = line
-                    p.font.size = Pt(14)  # Adjust font size if needed
+                    if list_font_size:
+                        p.font.size = list_font_size
             else:
                 placeholder.text = value
     return slide
 
 
-def generate_pptx_strem(slides, theme):
-    ppt = Presentation()
-    for slide_data in slides:
-        create_slide(ppt, slide_data)
+def get_list_font_size(theme):
+    # Themed decks inherit every text style from the cached template
+    return None if theme else Pt(14)
+
+
+def get_uncached_slides(slides, theme):
+    """Slides which build_pptx will render, the others come from the part cache."""
+    if not config.SLIDE_PART_CACHE_ENABLED:
+        return slides
+    list_font_size = get_list_font_size(theme)
+    return [x for x in slides if not is_slide_cached(x, list_font_size)]
+
+
+def build_pptx(slides, theme, images=None):
+    """
+    Builds the deck, reusing the parts of slides rendered before (see
+    utils.slide_cache) so that only new or edited slides are rendered.
+    Returns the deck and whether it is complete, i.e. no picture is missing
+    after a failed download.
+    """
+    list_font_size = get_list_font_size(theme)
+    if config.SLIDE_PART_CACHE_ENABLED:
+        cached_slides = [get_cached_slide(x, list_font_size) for x in slides]
+    else:
+        cached_slides = [None] * len(slides)
+
+    # Download every image of the slides to render up front, in parallel. The
+    # images given by the caller may miss some, a slide can be evicted from the
+    # part cache after they were prefetched
+    uncached = [x for x, cached in zip(slides, cached_slides) if cached is None]
+    images = images or {}
+    missing_urls = [x for x in get_image_urls(uncached) if x not in images]
+    if missing_urls:
+        with observe_stage("image_prefetch"):
+            images = {**images, **prefetch_images(missing_urls)}
+
+    complete = True
+    with observe_stage("pptx_build"):
+        ppt = new_presentation(theme)
+        for slide_data, cached in zip(slides, cached_slides):
+            if cached is not None:
+                load_slide(ppt, slide_data["layout_id"], cached)
+                continue
+            slide = create_slide(ppt, slide_data, images, list_font_size)
+            # A picture whose download failed is not cached, the next render retries it
+            if has_missing_images(slide, slide_data):
+                complete = False
+            elif config.SLIDE_PART_CACHE_ENABLED:
+                cache_slide(slide, slide_data, list_font_size)
+    return ppt, complete
+
+
+def save_pptx(ppt, pptx_stream):
+    with observe_stage("pptx_serialize"):
+        ppt.save(pptx_stream)
+    observe_size("pptx", pptx_stream.tell())
+    pptx_stream.seek(0)
 
-    if theme:
-        apply_theme(ppt, theme)
 
+def generate_pptx_strem(slides, theme):
+    """Renders the deck in memory, returns the file and whether it is complete."""
+    ppt, complete = build_pptx(slides, theme)
     pptx_stream = io.BytesIO()
-    ppt.save(pptx_stream)
-    pptx_stream.seek(0)
-    return pptx_stream
+    save_pptx(ppt, pptx_stream)
+    return pptx_stream, complete
+
+
+def generate_pptx_spooled(slides, theme, images=None):
+    """
+    Renders the deck into a temporary file kept in memory up to
+    PPTX_SPOOL_MAX_MEMORY bytes and spilled to disk beyond. Images are
+    prefetched in parallel unless already given as a {url: bytes} mapping,
+    only the output is spooled. Returns the file and whether it is complete.
+    """
+    ppt, complete = build_pptx(slides, theme, images=images)
+    pptx_stream = tempfile.SpooledTemporaryFile(max_size=config.PPTX_SPOOL_MAX_MEMORY)
+    save_pptx(ppt, pptx_stream)
+    return pptx_stream, complete
 
 
 def save_ppt(ppt, output_file="presentation.pptx"):
@@ -0,0 +1,110 @@
+import os
+import io
+import time
+import pstats
+import random
+import cProfile
+import logging
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+
+import config
+
+# cProfile (sys.monitoring from Python 3.12) and tracemalloc are process-wide,
+# a single capture runs at a time and concurrent ones are skipped
+_capture_lock = threading.Lock()
+
+
+def should_sample():
+    return random.random() < config.PROFILING_SAMPLE_RATE
+
+
+def get_profile_paths(profile_id):
+    """pstats dump (for snakeviz, pstats...) and text summary of a capture."""
+    base = os.path.join(config.PROFILING_DIR, profile_id)
+    return f"{base}.prof", f"{base}.txt"
+
+
+@contextmanager
+def capture_profile(profile_id, label=""):
+    """
+    Profiles the block with cProfile, and tracemalloc unless
+    PROFILING_TRACEMALLOC is off, then writes both to PROFILING_DIR. Yields
+    whether the capture runs, it is skipped while another one is running.
+    """
+    if not _capture_lock.acquire(blocking=False):
+        logging.info(f"profiling skipped, another capture is running, profile_id: {profile_id}")
+        yield False
+        return
+
+    trace_memory = config.PROFILING_TRACEMALLOC and not tracemalloc.is_tracing()
+    profiler = cProfile.Profile()
+    try:
+        if trace_memory:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield True
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            allocations = None
+            if trace_memory:
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                allocations = (after.compare_to(before, "lineno"), peak)
+            write_profile(profile_id, label, profiler, elapsed, allocations)
+    finally:
+        _capture_lock.release()
+
+
+def write_profile(profile_id, label, profiler, elapsed, allocations=None, limit=40):
+    prof_path, summary_path = get_profile_paths(profile_id)
+    try:
+        os.makedirs(config.PROFILING_DIR, exist_ok=True)
+        profiler.dump_stats(prof_path)
+
+        summary = io.StringIO()
+        summary.write(f"{label}\nduration: {elapsed * 1000:.1f}ms\n\n")
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        if allocations is not None:
+            diff, peak = allocations
+            summary.write(f"\ntraced memory peak: {peak / 1024:.1f}KB\ntop allocations:\n")
+            for stat in diff[:limit]:
+                summary.write(f"{stat}\n")
+        with open(summary_path, "w") as f:
+            f.write(summary.getvalue())
+    except OSError as e:
+        logging.warning(f"Error writing profile, profile_id: {profile_id}, Error: {e}")
+        return
+    logging.info(f"profile captured, profile_id: {profile_id}, path: {summary_path}")
+
+
+def profiled(name, get_id):
+    """
+    Decorator profiling a sampled fraction (PROFILING_SAMPLE_RATE) of the
+    calls, `get_id(*args, **kwargs)` naming the capture. With PROFILING_ENABLED
+    off the function is returned as is, without any overhead.
+    """
+
+    def decorator(fn):
+        if not config.PROFILING_ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not should_sample():
+                return fn(*args, **kwargs)
+            profile_id = f"{name}-{get_id(*args, **kwargs)}-{int(time.time())}"
+            with capture_profile(profile_id, label=name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
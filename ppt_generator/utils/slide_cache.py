@@ -0,0 +1,132 @@
+import io
+import json
+import hashlib
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+
+import config
+from utils.image_cache import LRUBytesCache
+from utils.metrics import count_cache_lookup
+
+# Bump when create_slide output changes, cached parts of older renders are ignored
+RENDER_VERSION = 1
+
+R_NAMESPACE = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+# Rendered slide parts (XML and images) shared by every render of this process
+slide_part_cache = LRUBytesCache(
+    max_bytes=config.SLIDE_PART_CACHE_MAX_BYTES,
+    spill_dir=config.SLIDE_PART_CACHE_DIR,
+    max_disk_bytes=config.SLIDE_PART_CACHE_MAX_DISK_BYTES,
+)
+
+
+def get_slide_key(slide_data, list_font_size=None):
+    """
+    Hash of what a rendered slide depends on: its layout and content, and the
+    list font size. Themes only style the master and layouts, a theme change
+    keeps the cached slides.
+    """
+    payload = json.dumps(
+        [RENDER_VERSION, slide_data["layout_id"], slide_data["content"], list_font_size],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_picture_url(item):
+    """The image URL of a picture placeholder, or None when it has none."""
+    url = item.get("image_url")
+    # Older rows may hold an error message instead of a URL
+    if "picture" in item["name"].lower() and isinstance(url, str) and url.startswith("http"):
+        return url
+    return None
+
+
+def has_missing_images(slide, slide_data):
+    """Whether a picture of the rendered slide is missing, its download failed."""
+    expected = sum(1 for x in slide_data["content"] if x.get("value") and get_picture_url(x))
+    images = sum(1 for rel in slide.part.rels.values() if rel.reltype == RT.IMAGE)
+    return images < expected
+
+
+def dump_slide(slide):
+    """
+    Serializes the slide XML and its relationships (layout and images), or
+    returns None when the slide has other relationships than those.
+    """
+    rels = []
+    blobs = []
+    for rId, rel in slide.part.rels.items():
+        if rel.reltype == RT.SLIDE_LAYOUT:
+            rels.append([rId, "layout", 0])
+        elif rel.reltype == RT.IMAGE and not rel.is_external:
+            blob = rel.target_part.blob
+            rels.append([rId, "image", len(blob)])
+            blobs.append(blob)
+        else:
+            return None
+    xml = etree.tostring(slide.part._element)
+    header = json.dumps({"rels": rels, "xml": len(xml)}).encode()
+    return b"".join([len(header).to_bytes(4, "big"), header, xml, *blobs])
+
+
+def load_slide(ppt, layout_id, data):
+    """Adds a slide to the presentation from the output of dump_slide."""
+    header_size = int.from_bytes(data[:4], "big")
+    header = json.loads(data[4 : 4 + header_size])
+    offset = 4 + header_size
+    xml = data[offset : offset + header["xml"]]
+    offset += header["xml"]
+
+    # Slides.add_slide() minus the cloning of the layout placeholders, which
+    # is most of its time and replaced by the cached XML anyway
+    slide_layout = ppt.slide_layouts[layout_id]
+    rId, slide = ppt.part.add_slide(slide_layout)
+    ppt.slides._sldIdLst.add_sldId(rId)
+    part = slide.part
+
+    # Relationship ids of the new slide part, images are stored once per package
+    rid_map = {}
+    for rId, kind, size in header["rels"]:
+        if kind == "layout":
+            rid_map[rId] = part.relate_to(slide_layout.part, RT.SLIDE_LAYOUT)
+        else:
+            blob = data[offset : offset + size]
+            offset += size
+            _, rid_map[rId] = part.get_or_add_image_part(io.BytesIO(blob))
+
+    element = parse_xml(xml)
+    for node in element.iter():
+        for name, value in node.attrib.items():
+            if name.startswith(R_NAMESPACE) and value in rid_map:
+                node.set(name, rid_map[value])
+
+    # Swap the content of the root element in place, the slide objects of the
+    # presentation keep referencing it
+    root = part._element
+    for child in list(root):
+        root.remove(child)
+    for child in list(element):
+        root.append(child)
+    return slide
+
+
+def get_cached_slide(slide_data, list_font_size=None):
+    """Returns the dumped slide or None, counting hits and misses."""
+    data = slide_part_cache.get(get_slide_key(slide_data, list_font_size))
+    count_cache_lookup("slide_part", data is not None)
+    return data
+
+
+def is_slide_cached(slide_data, list_font_size=None):
+    return slide_part_cache.get(get_slide_key(slide_data, list_font_size)) is not None
+
+
+def cache_slide(slide, slide_data, list_font_size=None):
+    """Caches a rendered slide, the caller checks has_missing_images first."""
+    data = dump_slide(slide)
+    if data is not None:
+        slide_part_cache.set(get_slide_key(slide_data, list_font_size), data)